@@ -1,20 +1,34 @@
+import atexit
 import sqlite3
 import json
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import os
-from datetime import datetime, timedelta
-import pytz
-import base64
+from datetime import date, datetime, timedelta, timezone
+from datetime import time as dt_time
 import re
+import functools
+import queue
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import telebot
 from telebot import types
-from apscheduler.schedulers.background import BackgroundScheduler
-from telegram_bot_calendar import DetailedTelegramCalendar, LSTEP
 from dotenv import load_dotenv
-from printr_client import get_token_quote, create_token, sign_and_submit_transaction, get_token_status
-from flask import Flask
+from printr_client import get_token_quote, create_token, sign_and_submit_transaction, get_token_status, warm_up
+from flask import Flask, request
 import threading
 
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib codec
+    orjson = None
+
+try:
+    from waitress import serve
+except ImportError:  # fall back to the Werkzeug dev server
+    serve = None
+
 app = Flask(__name__)
 
 
@@ -24,28 +38,41 @@ def health():
 
 
 def run_flask():
-    app.run(host="0.0.0.0", port=int(os.getenv("PORT", 8443)), debug=False)
-
+    port = int(os.getenv("PORT", 8443))
+    if serve is not None:
+        serve(app, host="0.0.0.0", port=port, threads=8)
+    else:
+        app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
 
-# Start Flask in a separate thread
-flask_thread = threading.Thread(target=run_flask)
-flask_thread.daemon = True
-flask_thread.start()
 
 # Load environment variables
 load_dotenv()
 
-# Logging setup
-logging.basicConfig(
-    filename="bot.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
-logger = logging.getLogger(__name__)
+# Logging setup: callers only enqueue records; a listener thread owns the
+# file and console handlers so request threads never block on the write
+log_formatter = logging.Formatter(
+    "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler = logging.FileHandler("bot.log")
+file_handler.setFormatter(log_formatter)
 console_handler = logging.StreamHandler()
-console_handler.setFormatter(
-    logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
-logger.addHandler(console_handler)
+console_handler.setFormatter(log_formatter)
+_log_queue = queue.SimpleQueue()
+log_listener = QueueListener(_log_queue,
+                             file_handler,
+                             console_handler,
+                             respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+# Importing printr_client has already given the root logger a file handler;
+# replace it so every record goes through the queue. The QueueHandler keeps
+# no formatter of its own: the listener's handlers format each record once
+root_logger = logging.getLogger()
+for handler in root_logger.handlers[:]:
+    root_logger.removeHandler(handler)
+    handler.close()
+root_logger.addHandler(QueueHandler(_log_queue))
+root_logger.setLevel(logging.INFO)
+logger = logging.getLogger(__name__)
 
 # Validate and load environment variables
 BOT_TOKEN = os.getenv("TELEGRAM_TOKEN")
@@ -63,21 +90,68 @@ if ALLOWED_USER_ID == 0:
         "ALLOWED_USER_ID not set. Bot will not allow any users until configured."
     )
 
-# Initialize Telegram bot
-bot = telebot.TeleBot(BOT_TOKEN)
-scheduler = BackgroundScheduler(timezone="UTC")
+# Initialize Telegram bot; handlers are I/O-bound (Telegram, SQLite, Printr),
+# so a larger worker pool keeps slow calls from blocking other updates
+bot = telebot.TeleBot(BOT_TOKEN, num_threads=int(os.getenv("BOT_THREADS", 4)))
+
+# With WEBHOOK_URL set, Telegram pushes updates to the Flask app instead of
+# the bot long-polling for them
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").rstrip("/")
+
+
+@app.route(f"/{BOT_TOKEN}", methods=["POST"])
+def telegram_webhook():
+    update = types.Update.de_json(request.get_data(as_text=True))
+    bot.process_new_updates([update])
+    return "", 200
+
 
 # Supported chains
 SUPPORTED_CHAINS = [
     "arbitrum", "avalanche", "base", "bnb", "ethereum", "mantle", "solana"
 ]
+SUPPORTED_CHAINS_SET = frozenset(SUPPORTED_CHAINS)
+SUPPORTED_CHAINS_TEXT = ", ".join(SUPPORTED_CHAINS)
+
+
+# Database connections (one per thread, reused across handlers)
+_db_local = threading.local()
+
+
+def get_conn():
+    conn = getattr(_db_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect("launches.db",
+                               timeout=30,
+                               cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")
+        _db_local.conn = conn
+    return conn
+
+
+# Statements shared by several handlers; sqlite3 caches the compiled form
+# per connection keyed on the exact SQL text, so each is spelled once here
+SQL_COUNT_PENDING = "SELECT COUNT(*) FROM launches WHERE user_id = ? AND status = 'pending'"
+SQL_SELECT_PENDING = "SELECT id, name FROM launches WHERE user_id = ? AND status = 'pending'"
+SQL_SCHEDULE_LAUNCH = "UPDATE launches SET status = ?, scheduled_time = ?, printr_status = ? WHERE id = ?"
+SQL_FAIL_LAUNCH = "UPDATE launches SET printr_status = 'FAILED', quote = COALESCE(?, quote) WHERE id = ?"
+
+
+# Database initialization; bump SCHEMA_VERSION whenever the schema changes
+SCHEMA_VERSION = 3
 
 
-# Database initialization
 def init_db():
     logger.info("Initializing SQLite database")
-    conn = sqlite3.connect("launches.db")
+    conn = get_conn()
     cursor = conn.cursor()
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] == SCHEMA_VERSION:
+        logger.info("Database schema is up to date")
+        return
 
     # Create launches table if it doesn't exist
     cursor.execute("""
@@ -92,14 +166,16 @@ def init_db():
             quote TEXT,
             printr_status TEXT,
             home_chain TEXT,
-            transaction_id TEXT
+            transaction_id TEXT,
+            name TEXT,
+            symbol TEXT
         )
     """)
 
     # Check for and add any missing columns
     required_columns = [
         'token_id', 'payload', 'quote', 'printr_status', 'home_chain',
-        'transaction_id'
+        'transaction_id', 'name', 'symbol'
     ]
     cursor.execute("PRAGMA table_info(launches)")
     existing_columns = [col[1] for col in cursor.fetchall()]
@@ -108,6 +184,31 @@ def init_db():
             logger.info(f"Adding missing column {col} to launches table")
             cursor.execute(f"ALTER TABLE launches ADD COLUMN {col} TEXT")
 
+    # Backfill denormalized name/symbol for launches stored before they existed
+    cursor.execute("""
+        UPDATE launches
+        SET name = json_extract(json_data, '$.name'),
+            symbol = json_extract(json_data, '$.symbol')
+        WHERE name IS NULL
+    """)
+
+    # Index the per-user pending listings and scheduled-slot conflict checks;
+    # (user_id, status) lookups use the leading columns of the same index
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_launches_user_status
+        ON launches (user_id, status, scheduled_time)
+    """)
+    # Index the scheduler tick's due-launch scan
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_launches_sched
+        ON launches (status, printr_status, scheduled_time)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_launches_user_name
+        ON launches (user_id, name)
+    """)
+    cursor.execute("ANALYZE launches")
+
     # Create wallets table if it doesn't exist
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS wallets (
@@ -119,97 +220,136 @@ def init_db():
         )
     """)
 
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     conn.commit()
-    conn.close()
     logger.info("Database initialized successfully")
 
 
-# Check if wallets are configured
+# Check if wallets are configured (cached per user until a wallet changes).
+# Every supported chain needs a row, so this counts rather than testing for
+# any row; the (user_id, chain) primary key caps the scan at one row per chain
+_wallets_ready = {}
+SQL_COUNT_WALLETS = "SELECT COUNT(*) FROM wallets WHERE user_id = ? AND chain IN ({})".format(
+    ",".join("?" for _ in SUPPORTED_CHAINS))
+
+
 def are_wallets_configured(user_id):
-    conn = sqlite3.connect("launches.db")
+    if user_id in _wallets_ready:
+        return _wallets_ready[user_id]
+    conn = get_conn()
     cursor = conn.cursor()
-    cursor.execute(
-        "SELECT COUNT(*) FROM wallets WHERE user_id = ? AND chain IN ({})".
-        format(",".join("?" for _ in SUPPORTED_CHAINS)),
-        [user_id] + SUPPORTED_CHAINS)
+    cursor.execute(SQL_COUNT_WALLETS, [user_id] + SUPPORTED_CHAINS)
     count = cursor.fetchone()[0]
-    conn.close()
-    return count == len(SUPPORTED_CHAINS)
+    _wallets_ready[user_id] = count == len(SUPPORTED_CHAINS)
+    return _wallets_ready[user_id]
+
+
+# Static inline keyboards, built once; telebot only serializes them on send
+def build_keyboard(buttons):
+    keyboard = types.InlineKeyboardMarkup()
+    for text, callback_data in buttons:
+        keyboard.add(
+            types.InlineKeyboardButton(text, callback_data=callback_data))
+    return keyboard
+
+
+MAIN_MENU_KEYBOARD = build_keyboard([
+    ("Upload JSON", "upload_json"),
+    ("Schedule", "schedule"),
+    ("Batch Schedule", "batch_schedule"),
+    ("Status", "status"),
+    ("Update Wallets", "update_wallets"),
+    ("Logs", "logs"),
+])
+STATUS_KEYBOARD = build_keyboard([
+    ("Specific", "status_specific"),
+    ("All", "status_all"),
+])
+UPLOAD_DONE_KEYBOARD = build_keyboard([
+    ("Schedule Now", "schedule"),
+    ("Batch Schedule", "batch_schedule"),
+])
+WALLET_CHAINS_KEYBOARD = build_keyboard([
+    (chain.capitalize(), f"update_wallet:{index}")
+    for index, chain in enumerate(SUPPORTED_CHAINS)
+])
 
 
 # Display main menu
 def display_main_menu(chat_id, message_text="Choose an option:"):
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(
-        types.InlineKeyboardButton("Upload JSON", callback_data="upload_json"))
-    keyboard.add(
-        types.InlineKeyboardButton("Schedule", callback_data="schedule"))
-    keyboard.add(
-        types.InlineKeyboardButton("Batch Schedule",
-                                   callback_data="batch_schedule"))
-    keyboard.add(types.InlineKeyboardButton("Status", callback_data="status"))
-    keyboard.add(
-        types.InlineKeyboardButton("Update Wallets",
-                                   callback_data="update_wallets"))
-    keyboard.add(types.InlineKeyboardButton("Logs", callback_data="logs"))
     bot.send_message(chat_id,
                      f"```{message_text}```",
                      parse_mode="Markdown",
-                     reply_markup=keyboard)
+                     reply_markup=MAIN_MENU_KEYBOARD)
 
 
 # Time conversion utilities
+# West Africa Time is a fixed UTC+1 offset with no DST
+WAT = timezone(timedelta(hours=1))
+_WAT_TIME_RE = re.compile(r"^(0[0-9]|1[0-9]|2[0-3]):[0-5][0-9]\sWAT$")
+
+
 def validate_time_input(time_str):
-    pattern = r"^(0[0-9]|1[0-9]|2[0-3]):[0-5][0-9]\sWAT$"
-    return bool(re.match(pattern, time_str))
+    return _WAT_TIME_RE.match(time_str) is not None
 
 
+# Expects input already checked by validate_time_input ("HH:MM WAT"); the
+# pattern only admits valid hours and minutes, so the conversion cannot fail
 def wat_to_utc(selected_date, time_str):
-    try:
-        slot_time = datetime.strptime(time_str, "%H:%M WAT")
-        wat_tz = pytz.timezone("Africa/Lagos")
-        wat_datetime = datetime.combine(selected_date, slot_time.time())
-        wat_datetime = wat_tz.localize(wat_datetime)
-        utc_datetime = wat_datetime.astimezone(pytz.UTC)
-        return utc_datetime
-    except ValueError as e:
-        logger.error(f"Invalid time format: {time_str}, error: {str(e)}")
-        return None
-    except Exception as e:
-        logger.error(f"An error occurred: {str(e)}")
-        return None
+    slot_time = dt_time(int(time_str[:2]), int(time_str[3:5]))
+    wat_datetime = datetime.combine(selected_date, slot_time, tzinfo=WAT)
+    return wat_datetime.astimezone(timezone.utc)
+
+
+# JSON codec for uploaded launches; orjson parses the downloaded bytes and
+# re-serializes each launch several times faster than the stdlib
+def load_json(data):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def dump_json(obj):
+    return orjson.dumps(obj).decode() if orjson else json.dumps(obj)
 
 
 # Validate JSON format
+REQUIRED_LAUNCH_FIELDS = ("name", "symbol", "description", "chains")
+REQUIRED_LAUNCH_FIELDS_SET = frozenset(REQUIRED_LAUNCH_FIELDS)
+_BASE64_RE = re.compile(r"[A-Za-z0-9+/]*={0,2}")
+# Characters b64decode skips by default, e.g. the newlines in wrapped data
+_BASE64_IGNORED_RE = re.compile(r"[^A-Za-z0-9+/=]+")
+
+
 def validate_json(data, user_id):
     logger.info(f"Validating JSON data for user_id: {user_id}")
-    required_fields = ["name", "symbol", "description", "chains"]
     try:
         launches = data.get("launches", [])
         if not launches:
             logger.error("No launches found in JSON")
             return False, "No launches found in JSON"
         for launch in launches:
-            for field in required_fields:
-                if field not in launch:
-                    logger.error(f"Missing required field: {field}")
-                    return False, f"Missing required field: {field}"
+            if not launch.keys() >= REQUIRED_LAUNCH_FIELDS_SET:
+                field = next(f for f in REQUIRED_LAUNCH_FIELDS
+                             if f not in launch)
+                logger.error(f"Missing required field: {field}")
+                return False, f"Missing required field: {field}"
             if not isinstance(launch["chains"], list) or not launch["chains"]:
                 logger.error("Invalid chains field in JSON")
                 return False, "Each launch must have a non-empty 'chains' array."
-            if not all(chain in SUPPORTED_CHAINS
-                       for chain in launch["chains"]):
+            if not SUPPORTED_CHAINS_SET.issuperset(launch["chains"]):
                 logger.error("Unsupported chain in JSON")
-                return False, f"Chains must be one of: {', '.join(SUPPORTED_CHAINS)}"
+                return False, f"Chains must be one of: {SUPPORTED_CHAINS_TEXT}"
             if "image" in launch:
-                try:
-                    image_bytes = base64.b64decode(launch["image"])
-                    if len(image_bytes) > 500 * 1024:
-                        logger.error("Image size exceeds 500KB")
-                        return False, "Image size must be less than 500KB."
-                except base64.binascii.Error:
+                # Check the encoding and decoded size without decoding
+                image = launch["image"]
+                if isinstance(image, str):
+                    image = _BASE64_IGNORED_RE.sub("", image)
+                if not isinstance(image, str) or len(image) % 4 or \
+                        not _BASE64_RE.fullmatch(image):
                     logger.error("Invalid base64 image")
                     return False, "Image must be valid base64-encoded string."
+                if len(image) // 4 * 3 - image.count("=", -2) > 500 * 1024:
+                    logger.error("Image size exceeds 500KB")
+                    return False, "Image size must be less than 500KB."
         logger.info("JSON validated successfully")
         return True, "Valid JSON"
     except Exception as e:
@@ -217,6 +357,21 @@ def validate_json(data, user_id):
         return False, f"Invalid JSON: {str(e)}"
 
 
+# Read the last n lines of a file without loading all of it
+def tail_file(path, n=10, block=8192):
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = bytearray()
+        while pos > 0 and data.count(b"\n") <= n:
+            read_size = min(block, pos)
+            pos -= read_size
+            f.seek(pos)
+            data[:0] = f.read(read_size)
+    lines = data.decode("utf-8", errors="replace").splitlines(keepends=True)
+    return lines[-n:]
+
+
 # Validate interval
 def validate_interval(num_launches, interval_hours):
     if num_launches * interval_hours > 24:
@@ -224,8 +379,172 @@ def validate_interval(num_launches, interval_hours):
     return True, "Valid interval"
 
 
-# User data storage
-user_data = {}
+# Scheduled slots (ISO strings) a batch starting on start_date could collide
+# with; a WAT date starts at 23:00 UTC the day before
+def get_taken_slots(user_id, start_date):
+    cursor = get_conn().cursor()
+    cursor.execute(
+        "SELECT scheduled_time FROM launches WHERE user_id = ? AND status = 'scheduled' AND scheduled_time >= ?",
+        (user_id, (start_date - timedelta(days=1)).isoformat()))
+    return {row[0] for row in cursor.fetchall()}
+
+
+# Telegram rejects messages over 4096 characters, so long reports are split
+# between parts into several code blocks
+MAX_MESSAGE_CHARS = 4000
+
+
+def chunk_parts(parts):
+    chunks = []
+    current = []
+    size = 0
+    for part in parts:
+        if current and size + len(part) > MAX_MESSAGE_CHARS - 6:
+            chunks.append("".join(current))
+            current = []
+            size = 0
+        current.append(part)
+        size += len(part)
+    chunks.append("".join(current))
+    return chunks
+
+
+def reply_code_block(message, parts):
+    chunks = chunk_parts(parts)
+    bot.reply_to(message, f"```{chunks[0]}```", parse_mode="Markdown")
+    for chunk in chunks[1:]:
+        bot.send_message(message.chat.id,
+                         f"```{chunk}```",
+                         parse_mode="Markdown")
+
+
+# Status reports run on a small worker pool, off the Telegram update threads
+STATUS_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+
+# Fetch deployment statuses concurrently instead of one by one
+def fetch_token_statuses(token_ids):
+    token_ids = list({token_id for token_id in token_ids if token_id})
+    if not token_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        return dict(zip(token_ids, executor.map(get_token_status,
+                                                token_ids)))
+
+
+def send_status_all(chat_id, message_id, launches):
+    try:
+        token_statuses = fetch_token_statuses(row[1] for row in launches)
+        parts = ["All Launches Status:\n"]
+        for launch_id, token_id, name, transaction_id in launches:
+            # One part per launch, so a launch is never split across messages
+            lines = [f"ID: {launch_id}, Name: {name}\n"]
+            if not token_id:
+                lines.append("Status: Not deployed yet\n")
+            else:
+                status, status_response = token_statuses[token_id]
+                if status == 200:
+                    deployments = status_response.get("deployments", [])
+                    lines.append(f"Token ID: {token_id}\n")
+                    if transaction_id:
+                        lines.append(f"Transaction ID: {transaction_id}\n")
+                    for dep in deployments:
+                        chain = dep.get("chain_id", "Unknown")
+                        dep_status = dep.get("status", "Unknown")
+                        lines.append(f"Chain: {chain}, Status: {dep_status}\n")
+                        if dep_status == "FAILED":
+                            lines.append(f"Error: {dep.get('x_chain_transaction', {}).get('message_id', 'Unknown')}\n")
+                else:
+                    lines.append(f"Error checking status: {status_response.get('error', {}).get('message', 'Unknown error')}\n")
+            lines.append("-" * 20 + "\n")
+            parts.append("".join(lines))
+        # The placeholder becomes the first chunk; the rest follow as new
+        # messages under Telegram's size limit
+        chunks = chunk_parts(parts)
+        bot.edit_message_text(f"```{chunks[0]}```",
+                              chat_id=chat_id,
+                              message_id=message_id,
+                              parse_mode="Markdown")
+        for chunk in chunks[1:]:
+            bot.send_message(chat_id, f"```{chunk}```", parse_mode="Markdown")
+    except Exception as e:
+        logger.error(f"Error building status report: {str(e)}")
+        bot.edit_message_text("```Error checking status. Please try again later.```",
+                              chat_id=chat_id,
+                              message_id=message_id,
+                              parse_mode="Markdown")
+    display_main_menu(chat_id)
+
+
+# Per-user conversation state, kept in a bounded LRU so users who stop
+# interacting with the bot are eventually evicted
+MAX_USER_STATES = 1024
+
+
+class UserState:
+    __slots__ = ("state", "wallet_chain", "wallet_inputs", "batch_date",
+                 "batch_count", "batch_interval", "batch_times",
+                 "single_date", "single_launch_id")
+
+    def __init__(self):
+        self.state = None  # name of the input the bot is waiting for
+        self.reset()
+
+    def reset(self):
+        self.wallet_chain = None
+        self.wallet_inputs = {}
+        self.batch_date = None
+        self.batch_count = 0
+        self.batch_interval = 0.0
+        self.batch_times = []
+        self.single_date = None
+        self.single_launch_id = None
+
+
+user_data = OrderedDict()
+_user_data_lock = threading.Lock()
+
+
+def _get_state(user_id):
+    with _user_data_lock:
+        user_state = user_data.get(user_id)
+        if user_state is None:
+            user_state = user_data[user_id] = UserState()
+            if len(user_data) > MAX_USER_STATES:
+                user_data.popitem(last=False)
+        else:
+            user_data.move_to_end(user_id)
+        return user_state
+
+
+# Handler filter matching users whose conversation is waiting for `state`;
+# past the login prompt only ALLOWED_USER_ID can be in a conversation, so
+# everyone else is rejected on the id compare before any state lookup
+def awaiting(state, authorized=True):
+    if not authorized:
+        return lambda message: getattr(user_data.get(message.from_user.id),
+                                       "state", None) == state
+    return lambda message: message.from_user.id == ALLOWED_USER_ID and \
+        getattr(user_data.get(message.from_user.id), "state", None) == state
+
+
+# Reject button presses from anyone but ALLOWED_USER_ID before the callback
+# handler runs; message handlers are guarded by their awaiting() filters
+def require_auth(handler):
+
+    @functools.wraps(handler)
+    def wrapper(call):
+        if call.from_user.id != ALLOWED_USER_ID:
+            logger.warning(
+                f"Unauthorized update from user_id: {call.from_user.id}")
+            bot.answer_callback_query(call.id)
+            bot.send_message(call.message.chat.id,
+                             "Unauthorized.",
+                             parse_mode="Markdown")
+            return
+        return handler(call)
+
+    return wrapper
 
 
 # Telegram handlers
@@ -233,17 +552,19 @@ user_data = {}
 def start(message):
     user_id = message.from_user.id
     logger.info(f"Received /start command from user_id: {user_id}")
-    user_data[user_id] = {"awaiting_user_id": True}
+    user_state = _get_state(user_id)
+    user_state.state = "awaiting_user_id"
+    user_state.reset()
     bot.reply_to(message,
                  "Please enter your user ID to authenticate:",
                  parse_mode="Markdown")
 
 
 @bot.message_handler(content_types=['text'],
-                     func=lambda message: user_data.get(
-                         message.from_user.id, {}).get("awaiting_user_id"))
+                     func=awaiting("awaiting_user_id", authorized=False))
 def handle_user_id(message):
     user_id = message.from_user.id
+    user_state = _get_state(user_id)
     logger.info(f"Received user ID input from user_id: {user_id}")
     try:
         input_id = int(message.text.strip())
@@ -253,15 +574,15 @@ def handle_user_id(message):
                          "Unauthorized user ID.",
                          parse_mode="Markdown")
             return
-        user_data[user_id]["awaiting_user_id"] = False
+        user_state.state = None
         if not are_wallets_configured(user_id):
-            user_data[user_id]["awaiting_wallet_chain"] = SUPPORTED_CHAINS[0]
-            user_data[user_id]["wallet_inputs"] = {}
+            user_state.wallet_chain = SUPPORTED_CHAINS[0]
+            user_state.wallet_inputs = {}
             bot.reply_to(
                 message,
                 f"Please enter the wallet address for {SUPPORTED_CHAINS[0]}:",
                 parse_mode="Markdown")
-            user_data[user_id]["awaiting_wallet_input"] = True
+            user_state.state = "awaiting_wallet_input"
             return
         display_main_menu(message.chat.id, "Welcome! Choose an option:")
     except ValueError:
@@ -269,19 +590,16 @@ def handle_user_id(message):
         bot.reply_to(message,
                      "Invalid user ID. Please enter a numeric ID.",
                      parse_mode="Markdown")
-        user_data[user_id]["awaiting_user_id"] = True
+        user_state.state = "awaiting_user_id"
 
 
 @bot.message_handler(
     content_types=['text'],
-    func=lambda message: user_data.get(message.from_user.id, {}).get(
-        "awaiting_wallet_input"))
+    func=awaiting("awaiting_wallet_input"))
 def handle_wallet_input(message):
     user_id = message.from_user.id
-    if user_id != ALLOWED_USER_ID:
-        bot.reply_to(message, "Unauthorized.", parse_mode="Markdown")
-        return
-    current_chain = user_data[user_id]["awaiting_wallet_chain"]
+    user_state = _get_state(user_id)
+    current_chain = user_state.wallet_chain
     wallet_address = message.text.strip()
     logger.info(
         f"Received wallet address for {current_chain} from user_id: {user_id}")
@@ -297,11 +615,11 @@ def handle_wallet_input(message):
             f"Invalid wallet address for {current_chain}. Please enter a valid address.",
             parse_mode="Markdown")
         return
-    user_data[user_id]["wallet_inputs"][current_chain] = {
+    user_state.wallet_inputs[current_chain] = {
         "wallet_address": wallet_address,
         "caip10_address": caip10_address
     }
-    conn = sqlite3.connect("launches.db")
+    conn = get_conn()
     cursor = conn.cursor()
     cursor.execute(
         """
@@ -309,241 +627,245 @@ def handle_wallet_input(message):
         VALUES (?, ?, ?, ?)
         """, (user_id, current_chain, wallet_address, caip10_address))
     conn.commit()
-    conn.close()
+    _wallets_ready.pop(user_id, None)
     logger.info(f"Wallet updated for {current_chain} for user_id: {user_id}")
     bot.reply_to(message,
                  f"Wallet for {current_chain} updated successfully.",
                  parse_mode="Markdown")
-    user_data[user_id]["awaiting_wallet_input"] = False
-    user_data[user_id]["awaiting_wallet_chain"] = None
-    user_data[user_id]["wallet_inputs"] = {}
+    user_state.state = None
+    user_state.wallet_chain = None
+    user_state.wallet_inputs = {}
     display_main_menu(message.chat.id, "Wallet updated. Choose an option:")
 
 
-@bot.callback_query_handler(func=lambda call: True)
-def button_callback(call):
-    user_id = call.from_user.id
-    logger.info(
-        f"Received callback from user_id: {user_id}, data: {call.data}")
-    if user_id != ALLOWED_USER_ID:
-        bot.answer_callback_query(call.id)
+# Callback handlers, dispatched on the action before the first ":" of
+# callback_data; any integer arguments follow it, colon-separated
+def _on_upload_json(call, user_state, args):
+    bot.send_message(call.message.chat.id,
+                     "Please upload a JSON file with launch details.",
+                     parse_mode="Markdown")
+    user_state.state = "awaiting_json"
+
+
+def _on_schedule(call, user_state, args):
+    from telegram_bot_calendar import DetailedTelegramCalendar
+    calendar, step = DetailedTelegramCalendar(calendar_id="single").build()
+    bot.send_message(call.message.chat.id,
+                     "```Select a date for your launch:```",
+                     parse_mode="Markdown",
+                     reply_markup=calendar)
+
+
+def _on_batch_schedule(call, user_state, args):
+    from telegram_bot_calendar import DetailedTelegramCalendar
+    calendar, step = DetailedTelegramCalendar(calendar_id="batch").build()
+    bot.send_message(call.message.chat.id,
+                     "```Select the start date for batch scheduling:```",
+                     parse_mode="Markdown",
+                     reply_markup=calendar)
+
+
+def _on_status(call, user_state, args):
+    bot.send_message(call.message.chat.id,
+                     "```Select status check type:```",
+                     parse_mode="Markdown",
+                     reply_markup=STATUS_KEYBOARD)
+
+
+def _on_status_specific(call, user_state, args):
+    bot.send_message(
+        call.message.chat.id,
+        "```Enter launch names or IDs (comma-separated, e.g., 'Token1,Token2' or '1,2,3'):```",
+        parse_mode="Markdown")
+    user_state.state = "awaiting_status_specific"
+
+
+def _on_status_all(call, user_state, args):
+    conn = get_conn()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id, token_id, name, transaction_id FROM launches WHERE user_id = ?",
+        (call.from_user.id, ))
+    launches = cursor.fetchall()
+    if not launches:
         bot.send_message(call.message.chat.id,
-                         "Unauthorized.",
+                         "```No launches found.```",
                          parse_mode="Markdown")
+        display_main_menu(call.message.chat.id)
         return
-    bot.answer_callback_query(call.id)
-    if call.data == "upload_json":
+    # Status lookups hit the Printr API; answer right away and fill in
+    # the report from a worker so this update thread is not held up
+    pending_msg = bot.send_message(call.message.chat.id,
+                                   "```Fetching status...```",
+                                   parse_mode="Markdown")
+    STATUS_EXECUTOR.submit(send_status_all, call.message.chat.id,
+                           pending_msg.message_id, launches)
+
+
+def _on_update_wallets(call, user_state, args):
+    bot.send_message(call.message.chat.id,
+                     "```Select a chain to update its wallet address:```",
+                     parse_mode="Markdown",
+                     reply_markup=WALLET_CHAINS_KEYBOARD)
+
+
+def _on_update_wallet(call, user_state, args):
+    chain = SUPPORTED_CHAINS[int(args[0])]
+    user_state.wallet_chain = chain
+    user_state.wallet_inputs = {}
+    bot.send_message(call.message.chat.id,
+                     f"```Please enter the wallet address for {chain}:```",
+                     parse_mode="Markdown")
+    user_state.state = "awaiting_wallet_input"
+
+
+def _on_logs(call, user_state, args):
+    user_id = call.from_user.id
+    try:
+        lines = tail_file("bot.log", 10)
+        response = "```Recent Logs:\n" + "".join(lines) + "```"
         bot.send_message(call.message.chat.id,
-                         "Please upload a JSON file with launch details.",
+                         response,
                          parse_mode="Markdown")
-        user_data[user_id]["awaiting_json"] = True
-    elif call.data == "schedule":
-        calendar, step = DetailedTelegramCalendar(calendar_id="single").build()
-        bot.send_message(call.message.chat.id,
-                         "```Select a date for your launch:```",
-                         parse_mode="Markdown",
-                         reply_markup=calendar)
-    elif call.data == "batch_schedule":
-        calendar, step = DetailedTelegramCalendar(calendar_id="batch").build()
-        bot.send_message(call.message.chat.id,
-                         "```Select the start date for batch scheduling:```",
-                         parse_mode="Markdown",
-                         reply_markup=calendar)
-    elif call.data == "status":
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(
-            types.InlineKeyboardButton("Specific",
-                                       callback_data="status_specific"))
-        keyboard.add(
-            types.InlineKeyboardButton("All", callback_data="status_all"))
+        logger.info(f"Sent logs to user_id: {user_id}")
+    except Exception as e:
+        logger.error(
+            f"Error reading logs for user_id: {user_id}: {str(e)}")
         bot.send_message(call.message.chat.id,
-                         "```Select status check type:```",
-                         parse_mode="Markdown",
-                         reply_markup=keyboard)
-    elif call.data == "status_specific":
+                         f"```Error reading logs: {str(e)}```",
+                         parse_mode="Markdown")
+    display_main_menu(call.message.chat.id)
+
+
+def _on_batch_method(call, user_state, args, method):
+    selected_date = date.fromordinal(int(args[0]))
+    num_launches = int(args[1])
+    logger.info(
+        f"Batch method selected: {method}, date: {selected_date}, launches: {num_launches}"
+    )
+    if method == "interval":
         bot.send_message(
             call.message.chat.id,
-            "```Enter launch names or IDs (comma-separated, e.g., 'Token1,Token2' or '1,2,3'):```",
+            f"```Selected start date: {selected_date.strftime('%Y-%m-%d')}\nEnter the interval between launches in hours (e.g., 2.5):```",
             parse_mode="Markdown")
-        user_data[user_id]["awaiting_status_specific"] = True
-    elif call.data == "status_all":
-        conn = sqlite3.connect("launches.db")
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, token_id, json_data, transaction_id FROM launches WHERE user_id = ?",
-            (user_id, ))
-        launches = cursor.fetchall()
-        conn.close()
-        if not launches:
-            bot.send_message(call.message.chat.id,
-                             "```No launches found.```",
-                             parse_mode="Markdown")
-            display_main_menu(call.message.chat.id)
-            return
-        response = "```All Launches Status:\n"
-        for launch_id, token_id, json_data, transaction_id in launches:
-            name = json.loads(json_data).get('name', 'Unknown')
-            response += f"ID: {launch_id}, Name: {name}\n"
-            if not token_id:
-                response += "Status: Not deployed yet\n"
-            else:
-                status, status_response = get_token_status(token_id)
-                if status == 200:
-                    deployments = status_response.get("deployments", [])
-                    response += f"Token ID: {token_id}\n"
-                    if transaction_id:
-                        response += f"Transaction ID: {transaction_id}\n"
-                    for dep in deployments:
-                        chain = dep.get("chain_id", "Unknown")
-                        dep_status = dep.get("status", "Unknown")
-                        response += f"Chain: {chain}, Status: {dep_status}\n"
-                        if dep_status == "FAILED":
-                            response += f"Error: {dep.get('x_chain_transaction', {}).get('message_id', 'Unknown')}\n"
-                else:
-                    response += f"Error checking status: {status_response.get('error', {}).get('message', 'Unknown error')}\n"
-            response += "-" * 20 + "\n"
-        response += "```"
-        bot.send_message(call.message.chat.id, response, parse_mode="Markdown")
-        display_main_menu(call.message.chat.id)
-    elif call.data == "update_wallets":
-        keyboard = types.InlineKeyboardMarkup()
-        for chain in SUPPORTED_CHAINS:
-            keyboard.add(
-                types.InlineKeyboardButton(
-                    chain.capitalize(),
-                    callback_data=f"update_wallet_{chain}"))
-        bot.send_message(call.message.chat.id,
-                         "```Select a chain to update its wallet address:```",
-                         parse_mode="Markdown",
-                         reply_markup=keyboard)
-    elif call.data.startswith("update_wallet_"):
-        chain = call.data.split("_")[2]
-        user_data[user_id]["awaiting_wallet_chain"] = chain
-        user_data[user_id]["wallet_inputs"] = {}
-        bot.send_message(call.message.chat.id,
-                         f"```Please enter the wallet address for {chain}:```",
-                         parse_mode="Markdown")
-        user_data[user_id]["awaiting_wallet_input"] = True
-    elif call.data == "logs":
-        try:
-            with open("bot.log", "r") as f:
-                lines = f.readlines()[-10:]
-                response = "```Recent Logs:\n" + "".join(lines) + "```"
-            bot.send_message(call.message.chat.id,
-                             response,
-                             parse_mode="Markdown")
-            logger.info(f"Sent logs to user_id: {user_id}")
-        except Exception as e:
-            logger.error(
-                f"Error reading logs for user_id: {user_id}: {str(e)}")
-            bot.send_message(call.message.chat.id,
-                             f"```Error reading logs: {str(e)}```",
-                             parse_mode="Markdown")
-        display_main_menu(call.message.chat.id)
-    elif call.data.startswith("batch_interval_") or call.data.startswith(
-            "batch_specific_"):
-        parts = call.data.split("_")
-        method = parts[1]
-        selected_date = datetime.strptime(parts[2], "%Y-%m-%d").date()
-        num_launches = int(parts[3])
+        user_state.state = "awaiting_batch_interval"
+        user_state.batch_date = selected_date
+        user_state.batch_count = num_launches
+    else:
+        bot.send_message(
+            call.message.chat.id,
+            f"```Selected start date: {selected_date.strftime('%Y-%m-%d')}\nEnter the time for launch 1 of {num_launches} per day (e.g., 14:30 WAT):```",
+            parse_mode="Markdown")
+        user_state.state = "awaiting_batch_specific_times"
+        user_state.batch_date = selected_date
+        user_state.batch_count = num_launches
+        user_state.batch_times = []
+
+
+def _on_calendar(call, user_state, args):
+    from telegram_bot_calendar import DetailedTelegramCalendar, LSTEP
+    user_id = call.from_user.id
+    result, key, step = DetailedTelegramCalendar(
+        calendar_id="batch" if "batch" in call.data else "single").process(
+            call.data)
+    if not result and key:
+        bot.edit_message_text(
+            f"```Select {LSTEP[step]}{' for batch scheduling' if 'batch' in call.data else ''}:```",
+            chat_id=call.message.chat.id,
+            message_id=call.message.message_id,
+            parse_mode="Markdown",
+            reply_markup=key)
+    elif result:
+        selected_date = result
         logger.info(
-            f"Batch method selected: {method}, date: {selected_date}, launches: {num_launches}"
+            f"User selected {'batch ' if 'batch' in call.data else ''}date: {selected_date}"
         )
-        if method == "interval":
+        conn = get_conn()
+        cursor = conn.cursor()
+        if "batch" in call.data:
+            cursor.execute(
+                SQL_COUNT_PENDING,
+                (user_id, ))
+            pending_count = cursor.fetchone()[0]
+            if pending_count == 0:
+                logger.info(
+                    f"No pending launches for batch scheduling for user_id: {user_id}"
+                )
+                bot.send_message(
+                    call.message.chat.id,
+                    "```No pending launches. Upload a JSON file first.```",
+                    parse_mode="Markdown")
+                display_main_menu(call.message.chat.id)
+                return
             bot.send_message(
                 call.message.chat.id,
-                f"```Selected start date: {selected_date.strftime('%Y-%m-%d')}\nEnter the interval between launches in hours (e.g., 2.5):```",
+                f"```Selected start date: {selected_date.strftime('%Y-%m-%d')}\nEnter the number of launches per day (1-10):```",
                 parse_mode="Markdown")
-            user_data[user_id]["awaiting_batch_interval"] = True
-            user_data[user_id]["batch_date"] = selected_date
-            user_data[user_id]["batch_count"] = num_launches
+            user_state.state = "awaiting_batch_count"
+            user_state.batch_date = selected_date
         else:
-            bot.send_message(
-                call.message.chat.id,
-                f"```Selected start date: {selected_date.strftime('%Y-%m-%d')}\nEnter the time for launch 1 of {num_launches} per day (e.g., 14:30 WAT):```",
-                parse_mode="Markdown")
-            user_data[user_id]["awaiting_batch_specific_times"] = True
-            user_data[user_id]["batch_date"] = selected_date
-            user_data[user_id]["batch_count"] = num_launches
-            user_data[user_id]["batch_times"] = []
-    else:
-        result, key, step = DetailedTelegramCalendar(
-            calendar_id="batch" if "batch" in call.data else "single").process(
-                call.data)
-        if not result and key:
-            bot.edit_message_text(
-                f"```Select {LSTEP[step]}{' for batch scheduling' if 'batch' in call.data else ''}:```",
-                chat_id=call.message.chat.id,
-                message_id=call.message.message_id,
-                parse_mode="Markdown",
-                reply_markup=key)
-        elif result:
-            selected_date = result
-            logger.info(
-                f"User selected {'batch ' if 'batch' in call.data else ''}date: {selected_date}"
-            )
-            conn = sqlite3.connect("launches.db")
-            cursor = conn.cursor()
-            if "batch" in call.data:
-                cursor.execute(
-                    "SELECT COUNT(*) FROM launches WHERE user_id = ? AND status = 'pending'",
-                    (user_id, ))
-                pending_count = cursor.fetchone()[0]
-                conn.close()
-                if pending_count == 0:
-                    logger.info(
-                        f"No pending launches for batch scheduling for user_id: {user_id}"
-                    )
-                    bot.send_message(
-                        call.message.chat.id,
-                        "```No pending launches. Upload a JSON file first.```",
-                        parse_mode="Markdown")
-                    display_main_menu(call.message.chat.id)
-                    return
+            cursor.execute(
+                "SELECT id, name, symbol FROM launches WHERE user_id = ? AND status = 'pending'",
+                (user_id, ))
+            launches = cursor.fetchall()
+            if not launches:
+                logger.info(
+                    f"No pending launches for single scheduling for user_id: {user_id}"
+                )
                 bot.send_message(
                     call.message.chat.id,
-                    f"```Selected start date: {selected_date.strftime('%Y-%m-%d')}\nEnter the number of launches per day (1-10):```",
+                    "```No pending launches. Upload a JSON file first.```",
                     parse_mode="Markdown")
-                user_data[user_id]["awaiting_batch_count"] = True
-                user_data[user_id]["batch_date"] = selected_date
-            else:
-                cursor.execute(
-                    "SELECT id, json_data FROM launches WHERE user_id = ? AND status = 'pending'",
-                    (user_id, ))
-                launches = cursor.fetchall()
-                conn.close()
-                if not launches:
-                    logger.info(
-                        f"No pending launches for single scheduling for user_id: {user_id}"
-                    )
-                    bot.send_message(
-                        call.message.chat.id,
-                        "```No pending launches. Upload a JSON file first.```",
-                        parse_mode="Markdown")
-                    display_main_menu(call.message.chat.id)
-                    return
-                response = "```Pending Launches:\n"
-                for launch_id, json_data in launches:
-                    data = json.loads(json_data)
-                    response += f"ID: {launch_id}, Name: {data.get('name', 'Unknown')}, Symbol: {data.get('symbol', 'N/A')}\n"
-                response += "Enter the ID of the launch to schedule:```"
-                bot.send_message(call.message.chat.id,
-                                 response,
-                                 parse_mode="Markdown")
-                user_data[user_id]["awaiting_single_launch_id"] = True
-                user_data[user_id]["single_date"] = selected_date
+                display_main_menu(call.message.chat.id)
+                return
+            parts = ["```Pending Launches:\n"]
+            for launch_id, name, symbol in launches:
+                parts.append(f"ID: {launch_id}, Name: {name}, Symbol: {symbol or 'N/A'}\n")
+            parts.append("Enter the ID of the launch to schedule:```")
+            response = "".join(parts)
+            bot.send_message(call.message.chat.id,
+                             response,
+                             parse_mode="Markdown")
+            user_state.state = "awaiting_single_launch_id"
+            user_state.single_date = selected_date
+
+
+CALLBACK_HANDLERS = {
+    "upload_json": _on_upload_json,
+    "schedule": _on_schedule,
+    "batch_schedule": _on_batch_schedule,
+    "status": _on_status,
+    "status_specific": _on_status_specific,
+    "status_all": _on_status_all,
+    "update_wallets": _on_update_wallets,
+    "update_wallet": _on_update_wallet,
+    "logs": _on_logs,
+    "batch_interval": functools.partial(_on_batch_method, method="interval"),
+    "batch_specific": functools.partial(_on_batch_method, method="specific"),
+}
+
+
+@bot.callback_query_handler(func=lambda call: True)
+@require_auth
+def button_callback(call):
+    user_id = call.from_user.id
+    user_state = _get_state(user_id)
+    logger.info(
+        f"Received callback from user_id: {user_id}, data: {call.data}")
+    bot.answer_callback_query(call.id)
+    action, _, args = call.data.partition(":")
+    # Anything that is not one of our own actions comes from the calendar
+    handler = CALLBACK_HANDLERS.get(action, _on_calendar)
+    handler(call, user_state, args.split(":") if args else [])
 
 
 @bot.message_handler(content_types=['document'],
-                     func=lambda message: user_data.get(
-                         message.from_user.id, {}).get("awaiting_json"))
+                     func=awaiting("awaiting_json"))
 def process_json_file(message):
     user_id = message.from_user.id
+    user_state = _get_state(user_id)
     logger.info(f"Processing JSON file from user_id: {user_id}")
-    user_data[user_id]["awaiting_json"] = False
-    if user_id != ALLOWED_USER_ID:
-        bot.reply_to(message, "Unauthorized.", parse_mode="Markdown")
-        return
+    user_state.state = None
     document = message.document
     if not document or not document.file_name.endswith(".json"):
         logger.error(f"Invalid file uploaded by user_id: {user_id}")
@@ -556,8 +878,8 @@ def process_json_file(message):
     logger.info(f"Downloading JSON file: {document.file_name}")
     file_content = bot.download_file(file.file_path)
     try:
-        json_data = json.loads(file_content.decode("utf-8"))
-        logger.info(f"JSON file downloaded and parsed: {json_data}")
+        json_data = load_json(file_content)
+        logger.info(f"JSON file downloaded and parsed ({len(file_content)} bytes)")
         is_valid, error_message = validate_json(json_data, user_id)
         if not is_valid:
             bot.reply_to(message,
@@ -565,30 +887,22 @@ def process_json_file(message):
                          parse_mode="Markdown")
             display_main_menu(message.chat.id)
             return
-        conn = sqlite3.connect("launches.db")
-        cursor = conn.cursor()
-        for launch in json_data["launches"]:
-            cursor.execute(
-                "INSERT INTO launches (user_id, json_data, status, home_chain) VALUES (?, ?, ?, ?)",
-                (user_id, json.dumps(launch), "pending", launch["chains"][0]),
-            )
-        conn.commit()
+        rows = [(user_id, dump_json(launch), "pending", launch["chains"][0],
+                 launch["name"], launch.get("symbol"))
+                for launch in json_data["launches"]]
+        conn = get_conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO launches (user_id, json_data, status, home_chain, name, symbol) VALUES (?, ?, ?, ?, ?, ?)",
+                rows)
         count = len(json_data["launches"])
-        conn.close()
         logger.info(
             f"Stored {count} launches in database for user_id: {user_id}")
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(
-            types.InlineKeyboardButton("Schedule Now",
-                                       callback_data="schedule"))
-        keyboard.add(
-            types.InlineKeyboardButton("Batch Schedule",
-                                       callback_data="batch_schedule"))
         bot.reply_to(
             message,
             f"```JSON uploaded successfully! {count} launches stored.\nUse /schedule, /batch_schedule, or buttons to queue launches.```",
             parse_mode="Markdown",
-            reply_markup=keyboard)
+            reply_markup=UPLOAD_DONE_KEYBOARD)
     except json.JSONDecodeError:
         logger.error(f"Invalid JSON file from user_id: {user_id}")
         bot.reply_to(message, "Invalid JSON format.", parse_mode="Markdown")
@@ -603,24 +917,20 @@ def process_json_file(message):
 
 @bot.message_handler(
     content_types=['text'],
-    func=lambda message: user_data.get(message.from_user.id, {}).get(
-        "awaiting_single_launch_id"))
+    func=awaiting("awaiting_single_launch_id"))
 def process_single_launch_id(message):
     user_id = message.from_user.id
+    user_state = _get_state(user_id)
     logger.info(f"Processing single launch ID input from user_id: {user_id}")
-    if user_id != ALLOWED_USER_ID:
-        bot.reply_to(message, "Unauthorized.", parse_mode="Markdown")
-        return
-    user_data[user_id]["awaiting_single_launch_id"] = False
+    user_state.state = None
     try:
         launch_id = int(message.text)
-        conn = sqlite3.connect("launches.db")
+        conn = get_conn()
         cursor = conn.cursor()
         cursor.execute(
             "SELECT id FROM launches WHERE user_id = ? AND status = 'pending' AND id = ?",
             (user_id, launch_id))
         if not cursor.fetchone():
-            conn.close()
             logger.info(
                 f"Invalid or unavailable launch ID {launch_id} for user_id: {user_id}"
             )
@@ -628,36 +938,32 @@ def process_single_launch_id(message):
                 message,
                 "```Invalid or unavailable launch ID. Please select a valid ID.```",
                 parse_mode="Markdown")
-            user_data[user_id]["awaiting_single_launch_id"] = True
+            user_state.state = "awaiting_single_launch_id"
             return
-        conn.close()
-        user_data[user_id]["single_launch_id"] = launch_id
+        user_state.single_launch_id = launch_id
         bot.reply_to(
             message,
-            f"```Selected date: {user_data[user_id]['single_date'].strftime('%Y-%m-%d')}\nEnter the time for launch ID {launch_id} (e.g., 14:30 WAT):```",
+            f"```Selected date: {user_state.single_date.strftime('%Y-%m-%d')}\nEnter the time for launch ID {launch_id} (e.g., 14:30 WAT):```",
             parse_mode="Markdown")
-        user_data[user_id]["awaiting_single_time"] = True
+        user_state.state = "awaiting_single_time"
     except ValueError:
         logger.info(f"Invalid launch ID input from user_id: {user_id}")
         bot.reply_to(message,
                      "```Invalid input. Please enter a valid launch ID.```",
                      parse_mode="Markdown")
-        user_data[user_id]["awaiting_single_launch_id"] = True
+        user_state.state = "awaiting_single_launch_id"
 
 
 @bot.message_handler(content_types=['text'],
-                     func=lambda message: user_data.get(
-                         message.from_user.id, {}).get("awaiting_single_time"))
+                     func=awaiting("awaiting_single_time"))
 def process_single_time(message):
     user_id = message.from_user.id
+    user_state = _get_state(user_id)
     logger.info(f"Processing single time input from user_id: {user_id}")
-    if user_id != ALLOWED_USER_ID:
-        bot.reply_to(message, "Unauthorized.", parse_mode="Markdown")
-        return
-    user_data[user_id]["awaiting_single_time"] = False
+    user_state.state = None
     time_str = message.text.strip()
-    selected_date = user_data[user_id]["single_date"]
-    launch_id = user_data[user_id]["single_launch_id"]
+    selected_date = user_state.single_date
+    launch_id = user_state.single_launch_id
     if not validate_time_input(time_str):
         logger.info(
             f"Invalid time format input from user_id: {user_id}: {time_str}")
@@ -665,28 +971,39 @@ def process_single_time(message):
             message,
             "```Invalid time format. Please enter time as HH:MM WAT (e.g., 14:30 WAT).```",
             parse_mode="Markdown")
-        user_data[user_id]["awaiting_single_time"] = True
+        user_state.state = "awaiting_single_time"
         return
     utc_time = wat_to_utc(selected_date, time_str)
-    if not utc_time:
+    conn = get_conn()
+    # Claim the slot and schedule the launch in one statement, so two
+    # concurrent requests cannot both pass the conflict check; the launch
+    # itself must still be this user's and pending, since it may have been
+    # batch-scheduled or deployed since it was picked
+    with conn:
+        row = conn.execute(
+            """
+            UPDATE launches
+            SET status = 'scheduled', scheduled_time = ?, printr_status = 'PENDING'
+            WHERE id = ? AND user_id = ? AND status = 'pending' AND NOT EXISTS (
+                SELECT 1 FROM launches
+                WHERE user_id = ? AND status = 'scheduled' AND scheduled_time = ?
+            )
+            RETURNING name
+            """, (utc_time.isoformat(), launch_id, user_id, user_id,
+                  utc_time.isoformat())).fetchone()
+        still_pending = row is not None or conn.execute(
+            "SELECT 1 FROM launches WHERE id = ? AND user_id = ? AND status = 'pending'",
+            (launch_id, user_id)).fetchone() is not None
+    if not still_pending:
         logger.info(
-            f"Invalid time conversion for input from user_id: {user_id}: {time_str}"
-        )
+            f"Launch ID {launch_id} is no longer pending for user_id: {user_id}")
         bot.reply_to(
             message,
-            "```Invalid time format. Please enter time as HH:MM WAT (e.g., 14:30 WAT).```",
+            f"```Launch ID {launch_id} is no longer pending; it may have been scheduled or launched already.```",
             parse_mode="Markdown")
-        user_data[user_id]["awaiting_single_time"] = True
+        display_main_menu(message.chat.id)
         return
-    conn = sqlite3.connect("launches.db")
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        SELECT COUNT(*) FROM launches
-        WHERE user_id = ? AND status = 'scheduled'
-        AND scheduled_time = ?
-        """, (user_id, utc_time.isoformat()))
-    if cursor.fetchone()[0] > 0:
+    if row is None:
         logger.info(
             f"Time slot conflict for {time_str} on {selected_date} for user_id: {user_id}"
         )
@@ -694,19 +1011,11 @@ def process_single_time(message):
             message,
             f"```Time slot {time_str} on {selected_date.strftime('%Y-%m-%d')} is already taken. Choose another time.```",
             parse_mode="Markdown")
-        user_data[user_id]["awaiting_single_time"] = True
-        conn.close()
+        user_state.state = "awaiting_single_time"
         return
-    cursor.execute(
-        "UPDATE launches SET status = ?, scheduled_time = ?, printr_status = ? WHERE id = ?",
-        ("scheduled", utc_time.isoformat(), "PENDING", launch_id))
-    cursor.execute("SELECT json_data FROM launches WHERE id = ?",
-                   (launch_id, ))
-    json_data = cursor.fetchone()[0]
-    name = json.loads(json_data).get('name', 'Unknown')
-    conn.commit()
-    conn.close()
-    response = f"```Scheduled Launch:\nID: {launch_id}, Name: {name}, Scheduled: {utc_time.strftime('%Y-%m-%d %H:%M')} UTC ({(utc_time + timedelta(hours=1)).strftime('%H:%M')} WAT)```"
+    name = row[0]
+    schedule_next_launch_check()
+    response = f"```Scheduled Launch:\nID: {launch_id}, Name: {name}, Scheduled: {utc_time.strftime('%Y-%m-%d %H:%M')} UTC ({utc_time.astimezone(WAT).strftime('%H:%M')} WAT)```"
     bot.reply_to(message, response, parse_mode="Markdown")
     logger.info(
         f"Scheduled launch ID {launch_id} for user_id: {user_id} on {selected_date}"
@@ -715,26 +1024,22 @@ def process_single_time(message):
 
 
 @bot.message_handler(content_types=['text'],
-                     func=lambda message: user_data.get(
-                         message.from_user.id, {}).get("awaiting_batch_count"))
+                     func=awaiting("awaiting_batch_count"))
 def process_batch_count(message):
     user_id = message.from_user.id
+    user_state = _get_state(user_id)
     logger.info(f"Processing batch launch count input from user_id: {user_id}")
-    if user_id != ALLOWED_USER_ID:
-        bot.reply_to(message, "Unauthorized.", parse_mode="Markdown")
-        return
-    user_data[user_id]["awaiting_batch_count"] = False
+    user_state.state = None
     try:
         count = int(message.text)
         if count < 1 or count > 10:
             raise ValueError("Count out of range")
-        conn = sqlite3.connect("launches.db")
+        conn = get_conn()
         cursor = conn.cursor()
         cursor.execute(
-            "SELECT COUNT(*) FROM launches WHERE user_id = ? AND status = 'pending'",
+            SQL_COUNT_PENDING,
             (user_id, ))
         pending_count = cursor.fetchone()[0]
-        conn.close()
         if count > pending_count:
             logger.info(
                 f"Not enough pending launches for user_id: {user_id}. Requested: {count}, Available: {pending_count}"
@@ -743,25 +1048,25 @@ def process_batch_count(message):
                 message,
                 f"```Not enough pending launches. Requested: {count}, Available: {pending_count}.```",
                 parse_mode="Markdown")
-            user_data[user_id]["awaiting_batch_count"] = True
+            user_state.state = "awaiting_batch_count"
             return
-        user_data[user_id]["batch_count"] = count
+        user_state.batch_count = count
         keyboard = types.InlineKeyboardMarkup()
         keyboard.add(
             types.InlineKeyboardButton(
                 "Fixed Interval",
                 callback_data=
-                f"batch_interval_{user_data[user_id]['batch_date'].strftime('%Y-%m-%d')}_{count}"
+                f"batch_interval:{user_state.batch_date.toordinal()}:{count}"
             ))
         keyboard.add(
             types.InlineKeyboardButton(
                 "Specific Times",
                 callback_data=
-                f"batch_specific_{user_data[user_id]['batch_date'].strftime('%Y-%m-%d')}_{count}"
+                f"batch_specific:{user_state.batch_date.toordinal()}:{count}"
             ))
         bot.reply_to(
             message,
-            f"```Selected start date: {user_data[user_id]['batch_date'].strftime('%Y-%m-%d')}\nChoose scheduling method:```",
+            f"```Selected start date: {user_state.batch_date.strftime('%Y-%m-%d')}\nChoose scheduling method:```",
             parse_mode="Markdown",
             reply_markup=keyboard)
     except ValueError:
@@ -769,64 +1074,128 @@ def process_batch_count(message):
         bot.reply_to(message,
                      "```Please enter a number between 1 and 10.```",
                      parse_mode="Markdown")
-        user_data[user_id]["awaiting_batch_count"] = True
+        user_state.state = "awaiting_batch_count"
 
 
 @bot.message_handler(
     content_types=['text'],
-    func=lambda message: user_data.get(message.from_user.id, {}).get(
-        "awaiting_batch_interval"))
+    func=awaiting("awaiting_batch_interval"))
 def process_batch_interval(message):
     user_id = message.from_user.id
+    user_state = _get_state(user_id)
     logger.info(f"Processing batch interval input from user_id: {user_id}")
-    if user_id != ALLOWED_USER_ID:
-        bot.reply_to(message, "Unauthorized.", parse_mode="Markdown")
-        return
-    user_data[user_id]["awaiting_batch_interval"] = False
+    user_state.state = None
     try:
         interval = float(message.text)
         if interval <= 0:
             raise ValueError("Interval must be positive")
         is_valid, error_message = validate_interval(
-            user_data[user_id]["batch_count"], interval)
+            user_state.batch_count, interval)
         if not is_valid:
             logger.info(
                 f"Invalid interval for user_id: {user_id}: {error_message}")
             bot.reply_to(message,
                          f"```{error_message}```",
                          parse_mode="Markdown")
-            user_data[user_id]["awaiting_batch_interval"] = True
+            user_state.state = "awaiting_batch_interval"
             return
-        user_data[user_id]["batch_interval"] = interval
+        user_state.batch_interval = interval
         bot.reply_to(
             message,
-            f"```Selected start date: {user_data[user_id]['batch_date'].strftime('%Y-%m-%d')}\nEnter start time for the first launch (e.g., 08:00 WAT):```",
+            f"```Selected start date: {user_state.batch_date.strftime('%Y-%m-%d')}\nEnter start time for the first launch (e.g., 08:00 WAT):```",
             parse_mode="Markdown")
-        user_data[user_id]["awaiting_batch_start_time"] = True
+        user_state.state = "awaiting_batch_start_time"
     except ValueError:
         logger.info(f"Invalid interval input from user_id: {user_id}")
         bot.reply_to(message,
                      "```Please enter a valid number of hours (e.g., 2.5).```",
                      parse_mode="Markdown")
-        user_data[user_id]["awaiting_batch_interval"] = True
+        user_state.state = "awaiting_batch_interval"
+
+
+# Batch slot generators; both yield UTC datetimes without end and only ever
+# add precomputed timedeltas to the first day's start times
+def interval_slots(start_time, interval_hours, num_launches, user_id, taken):
+    # Each day takes the next num_launches free slots from its start time,
+    # stepping over slots that are already taken
+    interval = timedelta(hours=interval_hours)
+    one_day = timedelta(days=1)
+    day_start = start_time
+    while True:
+        current_time = day_start
+        daily_count = 0
+        while daily_count < num_launches:
+            if current_time.isoformat() in taken:
+                logger.info(
+                    f"Time slot conflict at {current_time} for user_id: {user_id}"
+                )
+            else:
+                yield current_time
+                daily_count += 1
+            current_time += interval
+        day_start += one_day
+
+
+def specific_slots(times, taken):
+    # Day d's slots are the first day's UTC times shifted by d days
+    one_day = timedelta(days=1)
+    day_offset = timedelta(0)
+    while True:
+        for slot in times:
+            yield slot + day_offset
+        day_offset += one_day
+
+
+# Assign each pending launch the next slot from make_slots(taken) and write
+# them all at once; a slot that is still taken aborts the whole batch
+def schedule_batch(message, user_id, selected_date, make_slots):
+    conn = get_conn()
+    launches = conn.execute(SQL_SELECT_PENDING, (user_id, )).fetchall()
+    if not launches:
+        logger.info(
+            f"No pending launches for batch scheduling for user_id: {user_id}")
+        bot.reply_to(message,
+                     "```No pending launches. Upload a JSON file first.```",
+                     parse_mode="Markdown")
+        return
+    taken = get_taken_slots(user_id, selected_date)
+    updates = []
+    parts = ["Batch Scheduling Results:\n"]
+    for (launch_id, name), slot in zip(launches, make_slots(taken)):
+        slot_iso = slot.isoformat()
+        wat_slot = slot.astimezone(WAT)
+        if slot_iso in taken:
+            logger.info(f"Time slot conflict at {slot} for user_id: {user_id}")
+            bot.reply_to(
+                message,
+                f"```Time slot {wat_slot.strftime('%H:%M')} WAT on {wat_slot.strftime('%Y-%m-%d')} is already taken. Please restart batch scheduling.```",
+                parse_mode="Markdown")
+            return
+        updates.append(("scheduled", slot_iso, "PENDING", launch_id))
+        taken.add(slot_iso)
+        parts.append(f"ID: {launch_id}, Name: {name or 'Unknown'}, Scheduled: {slot.strftime('%Y-%m-%d %H:%M')} UTC ({wat_slot.strftime('%H:%M')} WAT)\n")
+    with conn:
+        conn.executemany(SQL_SCHEDULE_LAUNCH, updates)
+    schedule_next_launch_check()
+    parts.append(f"Scheduled {len(updates)} launches.")
+    reply_code_block(message, parts)
+    logger.info(
+        f"Batch scheduled {len(updates)} launches for user_id: {user_id}")
 
 
 @bot.message_handler(
     content_types=['text'],
-    func=lambda message: user_data.get(message.from_user.id, {}).get(
-        "awaiting_batch_start_time"))
+    func=awaiting("awaiting_batch_start_time"))
 def process_batch_interval_start_time(message):
     user_id = message.from_user.id
+    user_state = _get_state(user_id)
     logger.info(
         f"Processing batch interval start time input from user_id: {user_id}")
-    if user_id != ALLOWED_USER_ID:
-        bot.reply_to(message, "Unauthorized.", parse_mode="Markdown")
-        return
-    user_data[user_id]["awaiting_batch_start_time"] = False
+    user_state.state = None
     time_str = message.text.strip()
-    selected_date = user_data[user_id]["batch_date"]
-    num_launches = user_data[user_id]["batch_count"]
-    interval_hours = user_data[user_id]["batch_interval"]
+    selected_date = user_state.batch_date
+    num_launches = user_state.batch_count
+    interval_hours = user_state.batch_interval
     if not validate_time_input(time_str):
         logger.info(
             f"Invalid start time input from user_id: {user_id}: {time_str}")
@@ -834,96 +1203,28 @@ def process_batch_interval_start_time(message):
             message,
             "```Invalid time format. Please enter time as HH:MM WAT (e.g., 08:00 WAT).```",
             parse_mode="Markdown")
-        user_data[user_id]["awaiting_batch_start_time"] = True
+        user_state.state = "awaiting_batch_start_time"
         return
     start_time = wat_to_utc(selected_date, time_str)
-    if not start_time:
-        logger.info(
-            f"Invalid time conversion for input from user_id: {user_id}: {time_str}"
-        )
-        bot.reply_to(
-            message,
-            "```Invalid time format. Please enter time as HH:MM WAT (e.g., 08:00 WAT).```",
-            parse_mode="Markdown")
-        user_data[user_id]["awaiting_batch_start_time"] = True
-        return
-    conn = sqlite3.connect("launches.db")
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id, json_data, home_chain FROM launches WHERE user_id = ? AND status = 'pending'",
-        (user_id, ))
-    launches = cursor.fetchall()
-    if not launches:
-        logger.info(
-            f"No pending launches for batch scheduling for user_id: {user_id}")
-        bot.reply_to(message,
-                     "```No pending launches. Upload a JSON file first.```",
-                     parse_mode="Markdown")
-        conn.close()
-        display_main_menu(message.chat.id)
-        return
-    response = "```Batch Scheduling Results:\n"
-    scheduled_count = 0
-    current_date = selected_date
-    current_time = start_time
-    i = 0
-    while i < len(launches):
-        daily_count = 0
-        daily_times = []
-        while daily_count < num_launches and i < len(launches):
-            cursor.execute(
-                """
-                SELECT COUNT(*) FROM launches
-                WHERE user_id = ? AND status = 'scheduled'
-                AND scheduled_time = ?
-                """, (user_id, current_time.isoformat()))
-            if cursor.fetchone()[0] > 0:
-                logger.info(
-                    f"Time slot conflict at {current_time} for user_id: {user_id}"
-                )
-                current_time += timedelta(hours=interval_hours)
-                continue
-            daily_times.append(current_time)
-            daily_count += 1
-            i += 1
-            current_time += timedelta(hours=interval_hours)
-        for j, time in enumerate(daily_times):
-            launch_id, json_data, home_chain = launches[i - daily_count + j]
-            cursor.execute(
-                "UPDATE launches SET status = ?, scheduled_time = ?, printr_status = ? WHERE id = ?",
-                ("scheduled", time.isoformat(), "PENDING", launch_id))
-            name = json.loads(json_data).get('name', 'Unknown')
-            response += f"ID: {launch_id}, Name: {name}, Scheduled: {time.strftime('%Y-%m-%d %H:%M')} UTC ({(time + timedelta(hours=1)).strftime('%H:%M')} WAT)\n"
-            scheduled_count += 1
-        if i >= len(launches):
-            break
-        current_date += timedelta(days=1)
-        current_time = datetime.combine(current_date,
-                                        start_time.time()).astimezone(pytz.UTC)
-    conn.commit()
-    conn.close()
-    response += f"Scheduled {scheduled_count} launches.```"
-    bot.reply_to(message, response, parse_mode="Markdown")
-    logger.info(
-        f"Batch scheduled {scheduled_count} launches for user_id: {user_id}")
+    schedule_batch(
+        message, user_id, selected_date,
+        functools.partial(interval_slots, start_time, interval_hours,
+                          num_launches, user_id))
     display_main_menu(message.chat.id)
 
 
 @bot.message_handler(
     content_types=['text'],
-    func=lambda message: user_data.get(message.from_user.id, {}).get(
-        "awaiting_batch_specific_times"))
+    func=awaiting("awaiting_batch_specific_times"))
 def process_batch_specific_times(message):
     user_id = message.from_user.id
+    user_state = _get_state(user_id)
     logger.info(
         f"Processing batch specific times input from user_id: {user_id}")
-    if user_id != ALLOWED_USER_ID:
-        bot.reply_to(message, "Unauthorized.", parse_mode="Markdown")
-        return
     time_str = message.text.strip()
-    selected_date = user_data[user_id]["batch_date"]
-    num_launches = user_data[user_id]["batch_count"]
-    times = user_data[user_id]["batch_times"]
+    selected_date = user_state.batch_date
+    num_launches = user_state.batch_count
+    times = user_state.batch_times
     if not validate_time_input(time_str):
         logger.info(
             f"Invalid time format input from user_id: {user_id}: {time_str}")
@@ -933,15 +1234,6 @@ def process_batch_specific_times(message):
             parse_mode="Markdown")
         return
     utc_time = wat_to_utc(selected_date, time_str)
-    if not utc_time:
-        logger.info(
-            f"Invalid time conversion for input from user_id: {user_id}: {time_str}"
-        )
-        bot.reply_to(
-            message,
-            "```Invalid time format. Please enter time as HH:MM WAT (e.g., 14:30 WAT).```",
-            parse_mode="Markdown")
-        return
     if utc_time in times:
         logger.info(
             f"Duplicate time input from user_id: {user_id}: {time_str}")
@@ -958,81 +1250,21 @@ def process_batch_specific_times(message):
             f"```Enter the time for launch {current_launch + 1} of {num_launches} per day (e.g., 14:30 WAT):```",
             parse_mode="Markdown")
         return
-    user_data[user_id]["awaiting_batch_specific_times"] = False
-    conn = sqlite3.connect("launches.db")
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id, json_data, home_chain FROM launches WHERE user_id = ? AND status = 'pending'",
-        (user_id, ))
-    launches = cursor.fetchall()
-    if not launches:
-        logger.info(
-            f"No pending launches for batch scheduling for user_id: {user_id}")
-        bot.reply_to(message,
-                     "```No pending launches. Upload a JSON file first.```",
-                     parse_mode="Markdown")
-        conn.close()
-        display_main_menu(message.chat.id)
-        return
-    response = "```Batch Scheduling Results:\n"
-    scheduled_count = 0
-    current_date = selected_date
-    i = 0
-    while i < len(launches):
-        daily_count = 0
-        for j in range(num_launches):
-            if i >= len(launches):
-                break
-            utc_time = times[daily_count % len(times)]
-            slot_time = utc_time.time()
-            utc_time = datetime.combine(current_date,
-                                        slot_time).astimezone(pytz.UTC)
-            cursor.execute(
-                """
-                SELECT COUNT(*) FROM launches
-                WHERE user_id = ? AND status = 'scheduled'
-                AND scheduled_time = ?
-                """, (user_id, utc_time.isoformat()))
-            if cursor.fetchone()[0] > 0:
-                logger.info(
-                    f"Time slot conflict at {utc_time} for user_id: {user_id}")
-                bot.reply_to(
-                    message,
-                    f"```Time slot {(utc_time + timedelta(hours=1)).strftime('%H:%M')} WAT on {current_date.strftime('%Y-%m-%d')} is already taken. Please restart batch scheduling.```",
-                    parse_mode="Markdown")
-                conn.close()
-                return
-            launch_id, json_data, home_chain = launches[i]
-            cursor.execute(
-                "UPDATE launches SET status = ?, scheduled_time = ?, printr_status = ? WHERE id = ?",
-                ("scheduled", utc_time.isoformat(), "PENDING", launch_id))
-            name = json.loads(json_data).get('name', 'Unknown')
-            response += f"ID: {launch_id}, Name: {name}, Scheduled: {utc_time.strftime('%Y-%m-%d %H:%M')} UTC ({(utc_time + timedelta(hours=1)).strftime('%H:%M')} WAT)\n"
-            scheduled_count += 1
-            daily_count += 1
-            i += 1
-        current_date += timedelta(days=1)
-    conn.commit()
-    conn.close()
-    response += f"Scheduled {scheduled_count} launches.```"
-    bot.reply_to(message, response, parse_mode="Markdown")
-    logger.info(
-        f"Batch scheduled {scheduled_count} launches for user_id: {user_id}")
-    user_data[user_id]["batch_times"] = []
+    user_state.state = None
+    user_state.batch_times = []
+    schedule_batch(message, user_id, selected_date,
+                   functools.partial(specific_slots, times))
     display_main_menu(message.chat.id)
 
 
 @bot.message_handler(
     content_types=['text'],
-    func=lambda message: user_data.get(message.from_user.id, {}).get(
-        "awaiting_status_specific"))
+    func=awaiting("awaiting_status_specific"))
 def process_status_specific(message):
     user_id = message.from_user.id
+    user_state = _get_state(user_id)
     logger.info(f"Processing specific status check for user_id: {user_id}")
-    if user_id != ALLOWED_USER_ID:
-        bot.reply_to(message, "Unauthorized.", parse_mode="Markdown")
-        return
-    user_data[user_id]["awaiting_status_specific"] = False
+    user_state.state = None
     input_text = message.text.strip()
     identifiers = [x.strip() for x in input_text.split(",") if x.strip()]
     if not identifiers:
@@ -1044,76 +1276,73 @@ def process_status_specific(message):
                      parse_mode="Markdown")
         display_main_menu(message.chat.id)
         return
-    conn = sqlite3.connect("launches.db")
+    conn = get_conn()
     cursor = conn.cursor()
-    response = "```Specific Launches Status:\n"
+    # Resolve every identifier in one query; digits are IDs, the rest names
+    ids = [int(x) for x in identifiers if x.isdecimal()]
+    names = [x for x in identifiers if not x.isdecimal()]
+    cursor.execute(
+        "SELECT id, token_id, name, transaction_id FROM launches WHERE user_id = ? AND (id IN ({}) OR name IN ({})) ORDER BY id".
+        format(",".join("?" for _ in ids), ",".join("?" for _ in names)),
+        [user_id] + ids + names)
+    by_id = {}
+    by_name = {}
+    for row in cursor.fetchall():
+        by_id[row[0]] = row
+        by_name.setdefault(row[2], row)
+    token_statuses = fetch_token_statuses(row[1] for row in by_id.values())
+    parts = ["Specific Launches Status:\n"]
     found = False
     for identifier in identifiers:
-        try:
-            # Try as ID
-            launch_id = int(identifier)
-            cursor.execute(
-                "SELECT id, token_id, json_data, transaction_id FROM launches WHERE user_id = ? AND id = ?",
-                (user_id, launch_id))
-        except ValueError:
-            # Try as name
-            cursor.execute(
-                "SELECT id, token_id, json_data, transaction_id FROM launches WHERE user_id = ? AND json_data LIKE ?",
-                (user_id, f'%\"name\": \"{identifier}\"'))
-        result = cursor.fetchone()
+        if identifier.isdecimal():
+            result = by_id.get(int(identifier))
+        else:
+            result = by_name.get(identifier)
         if not result:
-            response += f"Identifier: {identifier}, Status: Not found\n"
+            parts.append(f"Identifier: {identifier}, Status: Not found\n")
             continue
         found = True
-        launch_id, token_id, json_data, transaction_id = result
-        name = json.loads(json_data).get('name', 'Unknown')
-        response += f"ID: {launch_id}, Name: {name}\n"
+        launch_id, token_id, name, transaction_id = result
+        parts.append(f"ID: {launch_id}, Name: {name}\n")
         if not token_id:
-            response += "Status: Not deployed yet\n"
+            parts.append("Status: Not deployed yet\n")
         else:
-            status, status_response = get_token_status(token_id)
+            status, status_response = token_statuses[token_id]
             if status == 200:
-                response += f"Token ID: {token_id}\n"
+                parts.append(f"Token ID: {token_id}\n")
                 if transaction_id:
-                    response += f"Transaction ID: {transaction_id}\n"
+                    parts.append(f"Transaction ID: {transaction_id}\n")
                 deployments = status_response.get("deployments", [])
                 for dep in deployments:
                     chain = dep.get("chain_id", "Unknown")
                     dep_status = dep.get("status", "Unknown")
-                    response += f"Chain: {chain}, Status: {dep_status}\n"
+                    parts.append(f"Chain: {chain}, Status: {dep_status}\n")
                     if dep_status == "FAILED":
-                        response += f"Error: {dep.get('x_chain_transaction', {}).get('message_id', 'Unknown')}\n"
+                        parts.append(f"Error: {dep.get('x_chain_transaction', {}).get('message_id', 'Unknown')}\n")
             else:
-                response += f"Error checking status: {status_response.get('error', {}).get('message', 'Unknown error')}\n"
-        response += "-" * 20 + "\n"
-    conn.close()
+                parts.append(f"Error checking status: {status_response.get('error', {}).get('message', 'Unknown error')}\n")
+        parts.append("-" * 20 + "\n")
     if not found:
-        response += "No matching launches found.```"
-    else:
-        response += "```"
-    bot.reply_to(message, response, parse_mode="Markdown")
+        parts.append("No matching launches found.")
+    reply_code_block(message, parts)
     display_main_menu(message.chat.id)
 
 
 @bot.message_handler(content_types=['text'],
-                     func=lambda message: user_data.get(
-                         message.from_user.id, {}).get("awaiting_status_id"))
+                     func=awaiting("awaiting_status_id"))
 def process_status_check(message):
     user_id = message.from_user.id
+    user_state = _get_state(user_id)
     logger.info(f"Processing status check for user_id: {user_id}")
-    if user_id != ALLOWED_USER_ID:
-        bot.reply_to(message, "Unauthorized.", parse_mode="Markdown")
-        return
-    user_data[user_id]["awaiting_status_id"] = False
+    user_state.state = None
     try:
         launch_id = int(message.text)
-        conn = sqlite3.connect("launches.db")
+        conn = get_conn()
         cursor = conn.cursor()
         cursor.execute(
-            "SELECT token_id, json_data, transaction_id FROM launches WHERE id = ? AND user_id = ?",
+            "SELECT token_id, name, transaction_id FROM launches WHERE id = ? AND user_id = ?",
             (launch_id, user_id))
         result = cursor.fetchone()
-        conn.close()
         if not result:
             logger.info(
                 f"No launch found for ID {launch_id} for user_id: {user_id}")
@@ -1122,7 +1351,7 @@ def process_status_check(message):
                          parse_mode="Markdown")
             display_main_menu(message.chat.id)
             return
-        token_id, json_data, transaction_id = result
+        token_id, name, transaction_id = result
         if not token_id:
             bot.reply_to(
                 message,
@@ -1132,7 +1361,6 @@ def process_status_check(message):
             return
         status, response = get_token_status(token_id)
         if status == 200:
-            name = json.loads(json_data).get('name', 'Unknown')
             deployments = response.get("deployments", [])
             response_text = f"```Token: {name} (ID: {launch_id}, Token ID: {token_id})\n"
             if transaction_id:
@@ -1158,7 +1386,7 @@ def process_status_check(message):
         bot.reply_to(message,
                      "```Please enter a valid launch ID.```",
                      parse_mode="Markdown")
-        user_data[user_id]["awaiting_status_id"] = True
+        user_state.state = "awaiting_status_id"
     except Exception as e:
         logger.error(f"Unexpected error occurred: {str(e)}")
         bot.reply_to(
@@ -1168,121 +1396,220 @@ def process_status_check(message):
         display_main_menu(message.chat.id)
 
 
+# Scheduler notifications are sent from a background thread, paced under
+# Telegram's ~30 messages/second limit, so the job never waits on Telegram
+_notify_queue = queue.Queue()
+
+
+def notify(text):
+    _notify_queue.put((ALLOWED_USER_ID, text))
+
+
+def _notify_loop():
+    while True:
+        chat_id, text = _notify_queue.get()
+        try:
+            bot.send_message(chat_id, text, parse_mode="Markdown")
+        except Exception as e:
+            logger.error(f"Error sending notification: {str(e)}")
+        time.sleep(1 / 30)
+
+
+# Placeholder JPEG used for launches uploaded without an image
+DEFAULT_IMAGE_B64 = (
+    "/9j/4AAQSkZJRgABAQAAAQABAAD/2wEEEAAfAB8AHwAfACEAHwAjACYAJgAjADAANAAuADQAMABHAEEAPAA8AEEARwBsAE0AUwBNAFMATQBsAKMAZgB3AGYAZgB3AGYAowCQAK8AjgCEAI4ArwCQAQMAzAC0ALQAzAEDASwA/ADuAPwBLAFrAUQBRAFrAckBsgHJAlUCVQMj/8IAEQgAQABAAwEiAAIRAQMRAf/EAC4AAAIDAQEAAAAAAAAAAAAAAAQFAAMGAQIBAQEBAAAAAAAAAAAAAAAAAAABAv/aAAwDAQACEAMQAAAA0MiwZxKSMKQaYO903KUvJzFjCDQYdEdyr76b4CQaHNajAVopOvkftdFelaZHZjVTUyFG0SC/rK2bDd0ls//EAC4QAAIBAwIEBAUFAQAAAAAAAAECAwAEERIhBRMxYRAiQVEjMkJTkRQVIIGCkv/aAAgBAQABPwD+LTIsipuSaurkQp5CpfbY1bXCzrnGD4cWeaK1BiJHnrhv6/Qdcv8A2Cxq8gvJIsR3IHYDFWgmuLHExIJOxq0hR5c88MQdWxqV7YT+Z/TLe21QQrGZGU7NjT2Hhfk/CUjMZberqR7HlLHMTG1c69FuJDL69MAHRXDZZG5gbcE60NSWxikMqSBB39Ku4U0a9R1v7bAmrHmGNi5PXari4jt4jI9XFy9zIS5IH0ioC0+zaGZNxq2NXM2vRJoAcAAE+oNcNulR+Qy7sdnqWISAbkYNS3bRStEI1ZFwMVbFyS2/LI2rjZ+DAPd6+kdNqFrc8vm6NhTPnHYfnvSOyyK67EHI/qobuSaMyyyFAOgSnSd0iUr1UaiRUDwriBH1FFrjUEjxxOgyEzqrJNWnE+VE6y/5okM51EAEk1pQjPnIHqBSvsFSJiAcgZNRS3MiJE+dLNVnBFHqKSBzUil45FGMlSKPCb4dEQ0eHX32KaGVJVjZFD9zSxPGcl4x2ClqLII2iLOQTq6Ba4S6DWkvz1HCkfyg+JUMCD0O1TcKl5qmGQYHvQ4ZKfnufwtftcX3ZKisoIyGK6nHqfD/xAAdEQABAwUBAAAAAAAAAAAAAAAAARAhESAxQmGB/9oACAECAQE/AHl1NrEy9OSeH//EABgRAAIDAAAAAAAAAAAAAAAAAAIREDBB/9oACAEDAQE/ALmK2P/Z"
+)
+
+
+# Launch checks run when the next launch falls due instead of on a fixed
+# tick, with LAUNCH_CHECK_MAX_WAIT as a safety net; scheduler is set in main()
+scheduler = None
+LAUNCH_CHECK_MAX_WAIT = timedelta(hours=1)
+LAUNCH_RETRY_WAIT = timedelta(minutes=1)
+_launch_job_lock = threading.Lock()
+# Due launches are deployed concurrently, but transactions from the same
+# chain's wallet are still submitted one at a time so nonces never collide
+LAUNCH_WORKERS = 8
+_submit_locks = {chain: threading.Lock() for chain in SUPPORTED_CHAINS}
+
+
+def schedule_next_launch_check(min_wait=timedelta(0)):
+    if scheduler is None:
+        return
+    cursor = get_conn().cursor()
+    cursor.execute("""
+        SELECT MIN(scheduled_time) FROM launches
+        WHERE status = 'scheduled' AND printr_status = 'PENDING'
+        """)
+    next_due = cursor.fetchone()[0]
+    now = datetime.now(timezone.utc)
+    run_date = now + LAUNCH_CHECK_MAX_WAIT
+    if next_due:
+        run_date = max(min(run_date, datetime.fromisoformat(next_due)),
+                       now + min_wait)
+    scheduler.add_job(run_scheduled_launch,
+                      "date",
+                      run_date=run_date,
+                      id="launch_check",
+                      replace_existing=True,
+                      misfire_grace_time=None)
+
+
 def run_scheduled_launch():
+    # A check requested while one is running is picked up by the
+    # reschedule at the end of the running one
+    if not _launch_job_lock.acquire(blocking=False):
+        logger.info("Scheduled launch job already running")
+        return
+    try:
+        launch_due_tokens()
+    finally:
+        _launch_job_lock.release()
+        # Always reschedule, and never sooner than LAUNCH_RETRY_WAIT
+        schedule_next_launch_check(LAUNCH_RETRY_WAIT)
+
+
+# A launch stays CLAIMED from the claim until create_token() returns, so a
+# CLAIMED row found at startup was cut off by a crash or restart, possibly
+# after Printr had already created the token. Running it again could print
+# and pay for a second token, so it is unscheduled and marked INTERRUPTED,
+# and the owner is asked to check Printr before rescheduling it by hand
+def mark_interrupted_claims():
+    conn = get_conn()
+    with conn:
+        interrupted = conn.execute(
+            """
+            UPDATE launches
+            SET status = 'pending', scheduled_time = NULL, printr_status = 'INTERRUPTED'
+            WHERE status = 'scheduled' AND printr_status = 'CLAIMED'
+            RETURNING id, name
+            """).fetchall()
+    for launch_id, name in interrupted:
+        logger.warning(f"Launch ID {launch_id} was interrupted mid-launch")
+        notify(f"```Launch {name} (ID: {launch_id}) was interrupted by a restart and will not be retried automatically.\n"
+               f"Printr may already have created the token. Check before scheduling it again; it is back in your pending launches.```")
+
+
+def launch_due_tokens():
     logger.info("Running scheduled launch job")
-    conn = sqlite3.connect("launches.db")
-    cursor = conn.cursor()
-    now = datetime.now(pytz.UTC)
-    cursor.execute(
-        """
-        SELECT id, json_data, scheduled_time, home_chain
-        FROM launches
-        WHERE status = 'scheduled' AND scheduled_time <= ? AND printr_status = 'PENDING'
-        """, (now.isoformat(), ))
-    launches = cursor.fetchall()
-    for launch_id, json_data, scheduled_time, home_chain in launches:
-        launch_data = json.loads(json_data)
-        name = launch_data.get("name", "Unnamed Token")
-        symbol = launch_data.get("symbol")
-        description = launch_data.get("description",
-                                      f"{name} launched via Printr")
-        image_b64 = launch_data.get(
-            "image",
-            "/9j/4AAQSkZJRgABAQAAAQABAAD/2wEEEAAfAB8AHwAfACEAHwAjACYAJgAjADAANAAuADQAMABHAEEAPAA8AEEARwBsAE0AUwBNAFMATQBsAKMAZgB3AGYAZgB3AGYAowCQAK8AjgCEAI4ArwCQAQMAzAC0ALQAzAEDASwA/ADuAPwBLAFrAUQBRAFrAckBsgHJAlUCVQMj/8IAEQgAQABAAwEiAAIRAQMRAf/EAC4AAAIDAQEAAAAAAAAAAAAAAAQFAAMGAQIBAQEBAAAAAAAAAAAAAAAAAAABAv/aAAwDAQACEAMQAAAA0MiwZxKSMKQaYO903KUvJzFjCDQYdEdyr76b4CQaHNajAVopOvkftdFelaZHZjVTUyFG0SC/rK2bDd0ls//EAC4QAAIBAwIEBAUFAQAAAAAAAAECAwAEERIhBRMxYRAiQVEjMkJTkRQVIIGCkv/aAAgBAQABPwD+LTIsipuSaurkQp5CpfbY1bXCzrnGD4cWeaK1BiJHnrhv6/Qdcv8A2Cxq8gvJIsR3IHYDFWgmuLHExIJOxq0hR5c88MQdWxqV7YT+Z/TLe21QQrGZGU7NjT2Hhfk/CUjMZberqR7HlLHMTG1c69FuJDL69MAHRXDZZG5gbcE60NSWxikMqSBB39Ku4U0a9R1v7bAmrHmGNi5PXari4jt4jI9XFy9zIS5IH0ioC0+zaGZNxq2NXM2vRJoAcAAE+oNcNulR+Qy7sdnqWISAbkYNS3bRStEI1ZFwMVbFyS2/LI2rjZ+DAPd6+kdNqFrc8vm6NhTPnHYfnvSOyyK67EHI/qobuSaMyyyFAOgSnSd0iUr1UaiRUDwriBH1FFrjUEjxxOgyEzqrJNWnE+VE6y/5okM51EAEk1pQjPnIHqBSvsFSJiAcgZNRS3MiJE+dLNVnBFHqKSBzUil45FGMlSKPCb4dEQ0eHX32KaGVJVjZFD9zSxPGcl4x2ClqLII2iLOQTq6Ba4S6DWkvz1HCkfyg+JUMCD0O1TcKl5qmGQYHvQ4ZKfnufwtftcX3ZKisoIyGK6nHqfD/xAAdEQABAwUBAAAAAAAAAAAAAAAAARAhESAxQmGB/9oACAECAQE/AHl1NrEy9OSeH//EABgRAAIDAAAAAAAAAAAAAAAAAAIREDBB/9oACAEDAQE/ALmK2P/Z"
-        )
-        chains = launch_data.get("chains", [])
-        external_links = launch_data.get("external_links", None)
-        status, quote_response = get_token_quote(chains)
-        if status != 200:
-            logger.error(
-                f"Quote failed for launch ID {launch_id}: {quote_response}")
-            cursor.execute(
-                "UPDATE launches SET printr_status = ?, quote = ? WHERE id = ?",
-                ("FAILED", json.dumps(quote_response), launch_id))
-            conn.commit()
-            try:
-                bot.send_message(
-                    ALLOWED_USER_ID,
-                    f"```Quote failed for {name} (ID: {launch_id}): {quote_response.get('error', {}).get('message', 'Unknown error')}```",
-                    parse_mode="Markdown")
-            except Exception as e:
-                logger.error(f"Error sending quote failure message: {str(e)}")
-            continue
-        status, response = create_token(name=name,
-                                        symbol=symbol,
-                                        description=description,
-                                        image_b64=image_b64,
-                                        chains=chains,
-                                        initial_buy_percent=5,
-                                        graduation_threshold=69000,
-                                        external_links=external_links)
-        if status == 201:
-            token_id = response.get("token_id")
-            payload = response.get("payload")
-            quote = response.get("quote")
-            cursor.execute(
-                "UPDATE launches SET token_id = ?, payload = ?, quote = ?, printr_status = ? WHERE id = ?",
-                (token_id, json.dumps(payload), json.dumps(quote), "DEPLOYING",
-                 launch_id))
-            conn.commit()
-            logger.info(
-                f"Token creation initiated for launch ID {launch_id}, token_id: {token_id}"
-            )
-            success, tx_result = sign_and_submit_transaction(
-                home_chain, payload)
-            if success:
-                cursor.execute(
-                    "UPDATE launches SET transaction_id = ? WHERE id = ?",
-                    (tx_result, launch_id))
-                conn.commit()
-                try:
-                    bot.send_message(
-                        ALLOWED_USER_ID,
-                        f"```Token creation initiated for {name} (ID: {launch_id}, Token ID: {token_id})\n"
-                        f"Transaction submitted on {home_chain}: {tx_result}\n"
-                        f"Use /status {launch_id} to track deployment.```",
-                        parse_mode="Markdown")
-                except Exception as e:
-                    logger.error(
-                        f"Error sending transaction success message: {str(e)}")
-            else:
-                cursor.execute(
-                    "UPDATE launches SET printr_status = ? WHERE id = ?",
-                    ("FAILED", launch_id))
-                conn.commit()
-                try:
-                    bot.send_message(
-                        ALLOWED_USER_ID,
-                        f"```Token creation failed for {name} (ID: {launch_id}): Transaction submission failed - {tx_result}```",
-                        parse_mode="Markdown")
-                except Exception as e:
-                    logger.error(
-                        f"Error sending transaction failure message: {str(e)}")
-        else:
-            logger.error(
-                f"Token creation failed for launch ID {launch_id}: {response}")
-            cursor.execute(
-                "UPDATE launches SET printr_status = ?, quote = ? WHERE id = ?",
-                ("FAILED", json.dumps(quote_response), launch_id))
-            conn.commit()
-            try:
-                bot.send_message(
-                    ALLOWED_USER_ID,
-                    f"```Token creation failed for {name} (ID: {launch_id}): {response.get('error', {}).get('message', 'Unknown error')}```",
-                    parse_mode="Markdown")
-            except Exception as e:
-                logger.error(f"Error sending failure message: {str(e)}")
-    conn.close()
+    conn = get_conn()
+    now = datetime.now(timezone.utc)
+    # Claim every due launch in one statement so an overlapping run can
+    # never pick the same launch up twice
+    with conn:
+        launches = conn.execute(
+            """
+            UPDATE launches SET printr_status = 'CLAIMED'
+            WHERE status = 'scheduled' AND scheduled_time <= ? AND printr_status = 'PENDING'
+            RETURNING id, json_data, home_chain
+            """, (now.isoformat(), )).fetchall()
+    if launches:
+        with ThreadPoolExecutor(max_workers=LAUNCH_WORKERS) as executor:
+            list(executor.map(process_launch, launches))
     logger.info("Scheduled launch job finished")
 
 
+# Every failure path goes through the same statement text, so each
+# connection compiles it once; a quote of None keeps the stored one
+def mark_launch_failed(conn, launch_id, quote=None):
+    with conn:
+        conn.execute(SQL_FAIL_LAUNCH,
+                     (None if quote is None else json.dumps(quote), launch_id))
+
+
+# Runs on a launch worker thread, which gets its own connection
+def process_launch(row):
+    launch_id, json_data, home_chain = row
+    conn = get_conn()
+    try:
+        launch_token(conn, launch_id, json_data, home_chain)
+    except Exception as e:
+        logger.error(f"Scheduled launch ID {launch_id} failed: {str(e)}")
+        mark_launch_failed(conn, launch_id)
+        notify(f"```Token creation failed for launch ID {launch_id}: {str(e)}```")
+
+
+def launch_token(conn, launch_id, json_data, home_chain):
+    launch_data = load_json(json_data)
+    name = launch_data.get("name", "Unnamed Token")
+    symbol = launch_data.get("symbol")
+    description = launch_data.get("description",
+                                  f"{name} launched via Printr")
+    image_b64 = launch_data.get("image", DEFAULT_IMAGE_B64)
+    chains = launch_data.get("chains", [])
+    external_links = launch_data.get("external_links", None)
+    status, quote_response = get_token_quote(chains)
+    if status != 200:
+        logger.error(
+            f"Quote failed for launch ID {launch_id}: {quote_response}")
+        mark_launch_failed(conn, launch_id, quote_response)
+        notify(f"```Quote failed for {name} (ID: {launch_id}): {quote_response.get('error', {}).get('message', 'Unknown error')}```")
+        return
+    status, response = create_token(name=name,
+                                    symbol=symbol,
+                                    description=description,
+                                    image_b64=image_b64,
+                                    chains=chains,
+                                    initial_buy_percent=5,
+                                    graduation_threshold=69000,
+                                    external_links=external_links)
+    if status != 201:
+        logger.error(
+            f"Token creation failed for launch ID {launch_id}: {response}")
+        mark_launch_failed(conn, launch_id, quote_response)
+        notify(f"```Token creation failed for {name} (ID: {launch_id}): {response.get('error', {}).get('message', 'Unknown error')}```")
+        return
+    token_id = response.get("token_id")
+    payload = response.get("payload")
+    quote = response.get("quote")
+    # Persist the token before submitting so it is known even if the
+    # submission never returns
+    with conn:
+        conn.execute(
+            "UPDATE launches SET token_id = ?, payload = ?, quote = ?, printr_status = ? WHERE id = ?",
+            (token_id, json.dumps(payload), json.dumps(quote), "DEPLOYING",
+             launch_id))
+    logger.info(
+        f"Token creation initiated for launch ID {launch_id}, token_id: {token_id}"
+    )
+    with _submit_locks.setdefault(home_chain, threading.Lock()):
+        success, tx_result = sign_and_submit_transaction(home_chain, payload)
+    if success:
+        with conn:
+            conn.execute("UPDATE launches SET transaction_id = ? WHERE id = ?",
+                         (tx_result, launch_id))
+        notify(f"```Token creation initiated for {name} (ID: {launch_id}, Token ID: {token_id})\n"
+               f"Transaction submitted on {home_chain}: {tx_result}\n"
+               f"Use /status {launch_id} to track deployment.```")
+    else:
+        mark_launch_failed(conn, launch_id)
+        notify(f"```Token creation failed for {name} (ID: {launch_id}): Transaction submission failed - {tx_result}```")
+
+
 def main():
+    global scheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
     init_db()
+    threading.Thread(target=_notify_loop, daemon=True).start()
+    threading.Thread(target=warm_up, daemon=True).start()
     logger.info("Starting APScheduler")
-    scheduler.add_job(run_scheduled_launch, "interval", minutes=1)
+    mark_interrupted_claims()
+    scheduler = BackgroundScheduler(timezone="UTC")
     scheduler.start()
+    schedule_next_launch_check()
     logger.info("APScheduler started")
+    if WEBHOOK_URL:
+        bot.remove_webhook()
+        bot.set_webhook(url=f"{WEBHOOK_URL}/{BOT_TOKEN}")
+        logger.info("Webhook set, serving Telegram updates from Flask")
+        run_flask()
+        return
+    # Start Flask in a separate thread
+    flask_thread = threading.Thread(target=run_flask)
+    flask_thread.daemon = True
+    flask_thread.start()
     logger.info("Starting bot polling...")
+    bot.remove_webhook()
     bot.polling(none_stop=True)
 
 
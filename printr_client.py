@@ -1,19 +1,31 @@
-import http.client
-import json
+import atexit
+import functools
 import os
+import random
+import threading
 import time
 import logging
 import base64
 from solana.rpc.api import Client
 #from solana.transaction import Transaction
-from solders.transaction import Transaction
+from solders.message import MessageV0
+from solders.transaction import VersionedTransaction
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
 from solders.instruction import Instruction, AccountMeta
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import InvalidHeader
+from urllib3.util.retry import Retry
 from web3 import Web3
 from eth_account import Account
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib codec used by requests
+    orjson = None
+
 # Load environment variables
 load_dotenv()
 PRINTR_API_URL = os.getenv("PRINTR_API_URL")
@@ -71,58 +83,164 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def parse_api_url():
-    """Parse the API URL to extract host and base path."""
+@functools.lru_cache(maxsize=None)
+def api_base_url():
+    """Return the Printr API base URL, adding the https scheme if it is missing.
+
+    PRINTR_API_URL is fixed at import, so the result is computed once; an
+    unset URL raises on every call instead of being cached.
+    """
     if not PRINTR_API_URL:
         raise ValueError("PRINTR_API_URL not set in .env")
-    if PRINTR_API_URL.startswith("https://"):
-        host = PRINTR_API_URL[8:]
-        base_path = ""
-    else:
-        host = PRINTR_API_URL
-        base_path = ""
-    if "/" in host:
-        host, base_path = host.split("/", 1)
-        base_path = f"/{base_path}"
-    return host, base_path
-
-def make_api_request(method, endpoint, payload=None, retries=3, backoff_factor=2):
-    """Make an API request to Printr with retry logic for rate limits and transient errors."""
-    host, base_path = parse_api_url()
-    headers = {
+    url = PRINTR_API_URL.rstrip("/")
+    if not url.startswith("https://"):
+        url = f"https://{url}"
+    return url
+
+# Longest single wait between retries, whatever the server asks for
+MAX_RETRY_WAIT = 10
+
+class PrintrRetry(Retry):
+    """Retry policy that also honors Printr's X-RateLimit-Reset header on 429.
+
+    Every wait is capped at MAX_RETRY_WAIT, and backoff is jittered so
+    concurrent callers do not retry in lockstep.
+    """
+
+    # Only a 429 proves the request was not acted on; a 503 with Retry-After
+    # is left to status_forcelist, which POST retries never include
+    RETRY_AFTER_STATUS_CODES = frozenset({429})
+
+    def get_retry_after(self, response):
+        # A malformed header falls back to the jittered backoff instead of
+        # aborting the request
+        try:
+            retry_after = super().get_retry_after(response)
+            if retry_after is None and response.status == 429:
+                reset = response.headers.get("X-RateLimit-Reset")
+                if reset is not None:
+                    retry_after = self.parse_retry_after(reset)
+        except InvalidHeader as e:
+            logger.warning(f"Ignoring malformed rate-limit header: {str(e)}")
+            retry_after = None
+        if retry_after is not None:
+            retry_after = min(retry_after, MAX_RETRY_WAIT)
+            logger.warning(f"Rate limited, retrying after {retry_after} seconds")
+        return retry_after
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return min(backoff * random.uniform(0.5, 1.5), MAX_RETRY_WAIT)
+
+
+def make_session(retry):
+    """Build a keep-alive session so repeated Printr calls reuse one TLS connection."""
+    session = requests.Session()
+    session.headers.update({
         "Content-Type": "application/json",
         "Authorization": f"Bearer {PRINTR_BEARER_TOKEN}",
-    }
-    conn = http.client.HTTPSConnection(host)
+    })
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+    return session
+
+
+class RateLimiter:
+    """Space out requests once Printr reports that few calls are left in the window."""
+
+    def __init__(self, low_water=5, max_window=300):
+        self.low_water = low_water
+        self.max_window = max_window
+        self._lock = threading.Lock()
+        self._spacing = 0.0
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot)
+            self._next_slot = start + self._spacing
+        if start > now:
+            time.sleep(start - now)
+
+    def update(self, headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining = int(remaining)
+            reset = float(reset)
+        except ValueError:
+            return
+        # The reset is expected in seconds; anything else (an epoch
+        # timestamp, a negative value) is ignored rather than trusted
+        if not 0 < reset <= self.max_window:
+            return
+        # Plenty of quota left: no pacing; otherwise spread what is left over
+        # the seconds until the window resets, never more than MAX_RETRY_WAIT
+        # between calls
+        spacing = 0.0 if remaining >= self.low_water else min(
+            reset / (remaining + 1), MAX_RETRY_WAIT)
+        with self._lock:
+            self._spacing = spacing
+
+
+# Idempotent requests (status polls) are retried on 429, gateway errors and
+# any connection or read failure
+session = make_session(PrintrRetry(
+    total=3,
+    backoff_factor=2,
+    status_forcelist=(429, 502, 503, 504),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+))
+atexit.register(session.close)
+# A POST such as /print may already have taken effect after a 5xx or a read
+# failure, so POSTs are retried only on 429 and on failures to connect
+post_session = make_session(PrintrRetry(
+    total=3,
+    read=False,
+    other=0,
+    backoff_factor=2,
+    status_forcelist=(429, ),
+    allowed_methods=frozenset({"POST"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+))
+atexit.register(post_session.close)
+rate_limiter = RateLimiter()
+
+def parse_response(response):
+    """Decode a JSON response body, with orjson when it is available."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+def make_api_request(method, endpoint, payload=None):
+    """Make an API request to Printr; retries and rate limits are handled by the session."""
+    url = f"{api_base_url()}{endpoint}"
     try:
-        for attempt in range(retries):
-            try:
-                if payload:
-                    conn.request(method, f"{base_path}{endpoint}", json.dumps(payload), headers)
-                else:
-                    conn.request(method, f"{base_path}{endpoint}", headers=headers)
-                response = conn.getresponse()
-                data = response.read().decode("utf-8")
-                if response.status in (200, 201):
-                    return response.status, json.loads(data)
-                elif response.status == 429:
-                    retry_after = int(response.getheader("X-RateLimit-Reset", 60))
-                    logger.warning(f"Rate limit exceeded, retrying after {retry_after} seconds")
-                    time.sleep(retry_after)
-                    continue
-                elif response.status in (400, 401, 404, 500):
-                    logger.error(f"API error {response.status}: {data}")
-                    return response.status, json.loads(data)
-                else:
-                    logger.error(f"Unexpected status {response.status}: {data}")
-                    return response.status, {"error": {"code": "UNKNOWN", "message": data}}
-            except Exception as e:
-                logger.error(f"Request attempt {attempt + 1} failed: {str(e)}")
-                if attempt == retries - 1:
-                    return 500, {"error": {"code": "REQUEST_FAILED", "message": str(e)}}
-                time.sleep(backoff_factor ** attempt)
-    finally:
-        conn.close()
+        # create_token bodies carry a base64 image, so encode them straight
+        # to bytes with orjson when it is available
+        if payload is not None and orjson is not None:
+            body = {"data": orjson.dumps(payload)}
+        else:
+            body = {"json": payload}
+        rate_limiter.wait()
+        request_session = post_session if method == "POST" else session
+        response = request_session.request(method, url, timeout=(5, 30), **body)
+        rate_limiter.update(response.headers)
+        if response.status_code in (200, 201):
+            return response.status_code, parse_response(response)
+        elif response.status_code in (400, 401, 404, 500):
+            logger.error(f"API error {response.status_code}: {response.text}")
+            return response.status_code, parse_response(response)
+        else:
+            logger.error(f"Unexpected status {response.status_code}: {response.text}")
+            return response.status_code, {"error": {"code": "UNKNOWN", "message": response.text}}
+    except Exception as e:
+        logger.error(f"Request failed: {str(e)}")
+        return 500, {"error": {"code": "REQUEST_FAILED", "message": str(e)}}
 
 def get_token_quote(chains, initial_buy_percent=5, graduation_threshold=69000):
     """Get a quote for token creation from /print/quote."""
@@ -162,6 +280,82 @@ def create_token(name, symbol, description, image_b64, chains, initial_buy_perce
     status, response = make_api_request("POST", "/print", payload)
     return status, response
 
+# RPC clients and signing accounts, built once per chain and reused
+_web3_clients = {}
+_solana_clients = {}
+_accounts = {}
+
+
+# Program ids and common accounts repeat across instructions and launches,
+# so their base58 decodes are memoized
+parse_pubkey = functools.lru_cache(maxsize=2048)(Pubkey.from_string)
+
+
+def get_web3(chain_key, rpc_endpoint):
+    w3 = _web3_clients.get(chain_key)
+    if w3 is None:
+        w3 = Web3(Web3.HTTPProvider(rpc_endpoint, request_kwargs={"timeout": 30}))
+        _web3_clients[chain_key] = w3
+    return w3
+
+
+def get_solana_client(chain_key, rpc_endpoint):
+    client = _solana_clients.get(chain_key)
+    if client is None:
+        client = Client(rpc_endpoint, timeout=30)
+        _solana_clients[chain_key] = client
+    return client
+
+
+def get_account(chain_key, private_key):
+    account = _accounts.get(chain_key)
+    if account is None:
+        account = Account.from_key(private_key)
+        _accounts[chain_key] = account
+    return account
+
+
+# Session for the preflight batch and warm-up only; it must not carry the
+# Printr auth headers. web3 keeps its own per-thread sessions and may close
+# any session handed to it, so this one is never given to a provider
+rpc_session = requests.Session()
+atexit.register(rpc_session.close)
+
+
+def evm_preflight(rpc_endpoint, address):
+    """Fetch the gas price and pending nonce in one JSON-RPC batch.
+
+    Returns None when the endpoint rejects batches or either call fails, so
+    the caller can fall back to individual requests.
+    """
+    batch = [
+        {"jsonrpc": "2.0", "id": 0, "method": "eth_gasPrice", "params": []},
+        {"jsonrpc": "2.0", "id": 1, "method": "eth_getTransactionCount", "params": [address, "pending"]},
+    ]
+    try:
+        results = rpc_session.post(rpc_endpoint, json=batch, timeout=(5, 30)).json()
+    except (requests.RequestException, ValueError) as e:
+        logger.warning(f"Batched RPC preflight failed: {str(e)}")
+        return None
+    if not isinstance(results, list):
+        return None
+    by_id = {item.get("id"): item.get("result") for item in results if isinstance(item, dict)}
+    if by_id.get(0) is None or by_id.get(1) is None:
+        return None
+    return int(by_id[0], 16), int(by_id[1], 16)
+
+
+def warm_up():
+    """Open the Printr and EVM RPC connections ahead of the first real call."""
+    targets = [(session, api_base_url())] if PRINTR_API_URL else []
+    targets += [(rpc_session, url) for chain, url in RPC_ENDPOINTS.items() if url and chain != "solana"]
+    for target_session, url in targets:
+        try:
+            target_session.head(url, timeout=3)
+        except requests.RequestException as e:
+            logger.info(f"Warm-up request to {url} failed: {str(e)}")
+
+
 def sign_and_submit_transaction(home_chain, payload):
     """Sign and submit the transaction based on the home chain."""
     chain_key = home_chain.split(":")[0]  # e.g., 'solana' or 'eip155'
@@ -173,38 +367,45 @@ def sign_and_submit_transaction(home_chain, payload):
 
     try:
         if chain_key == "solana":
-            client = Client(rpc_endpoint)
+            client = get_solana_client(chain_key, rpc_endpoint)
             keypair = Keypair.from_base58_string(private_key)  # Or use from_seed for seed phrase
-            tx = Transaction()
+            instructions = []
             for ix in payload.get("ixs", []):
-                accounts = [AccountMeta(Pubkey.from_string(acc["pubkey"]), acc["is_signer"], acc["is_writable"]) for acc in ix["accounts"]]
-                instruction = Instruction(
-                    program_id=Pubkey.from_string(ix["program_id"]),
+                accounts = [AccountMeta(parse_pubkey(acc["pubkey"]), acc["is_signer"], acc["is_writable"]) for acc in ix["accounts"]]
+                instructions.append(Instruction(
+                    program_id=parse_pubkey(ix["program_id"]),
                     accounts=accounts,
                     data=base64.b64decode(ix["data"])
-                )
-                tx.add(instruction)
-            response = client.send_transaction(tx, keypair)
+                ))
+            # Compile the message once and sign it as a v0 transaction
+            blockhash = client.get_latest_blockhash().value.blockhash
+            message = MessageV0.try_compile(keypair.pubkey(), instructions, [], blockhash)
+            tx = VersionedTransaction(message, [keypair])
+            response = client.send_raw_transaction(bytes(tx))
             tx_id = response.value
             logger.info(f"Solana transaction submitted: {tx_id}")
             return True, tx_id
         else:  # EVM chains (ethereum, arbitrum, avalanche, base, bnb, mantle)
-            w3 = Web3(Web3.HTTPProvider(rpc_endpoint))
-            account = Account.from_key(private_key)
+            w3 = get_web3(chain_key, rpc_endpoint)
+            account = get_account(chain_key, private_key)
             to_address = payload.get("to")
             calldata = payload.get("calldata")
             value = int(payload.get("value", "0"), 16) if payload.get("value") else 0
             gas_limit = payload.get("gas_limit", 1000000)
+            preflight = evm_preflight(rpc_endpoint, account.address)
+            if preflight is None:
+                preflight = w3.eth.gas_price, w3.eth.get_transaction_count(account.address, "pending")
+            gas_price, nonce = preflight
             tx = {
                 "to": w3.to_checksum_address(to_address),
                 "data": calldata,
                 "value": value,
                 "gas": gas_limit,
-                "gasPrice": w3.eth.gas_price,
-                "nonce": w3.eth.get_transaction_count(account.address),
+                "gasPrice": gas_price,
+                "nonce": nonce,
                 "chainId": int(home_chain.split(":")[1])
             }
-            signed_tx = w3.eth.account.sign_transaction(tx, private_key)
+            signed_tx = account.sign_transaction(tx)
             tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
             logger.info(f"EVM transaction submitted on {chain_key}: {tx_hash.hex()}")
             return True, tx_hash.hex()
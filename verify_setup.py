@@ -56,14 +56,17 @@ RPC_VARS = [
     "RPC_SOLANA",
 ]
 
-def check_vars(var_list, category):
+# Values left over from .env.example count as not configured
+PLACEHOLDER_PREFIXES = ("your_", "0x")
+
+def check_vars(var_list, category, env=os.environ):
     """Check if variables in the list are set."""
     missing = []
     configured = []
     
     for var in var_list:
-        value = os.getenv(var)
-        if not value or value.startswith("your_") or value.startswith("0x"):
+        value = env.get(var)
+        if not value or value.startswith(PLACEHOLDER_PREFIXES):
             missing.append(var)
         else:
             configured.append(var)